@@ -0,0 +1,66 @@
+import bisect
+
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QPainter, QPen, QColor
+from PyQt5.QtCore import Qt, pyqtSignal
+
+
+class CandidateBar(QWidget):
+
+    # Faixa exibida abaixo do slider do vídeo, com uma marca para cada frame sugerido pela
+    # análise de movimento (core.MotionAnalysis). Um clique leva ao candidato mais próximo
+
+    # Emitido com o tempo (ms) do candidato escolhido
+    jump = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+
+        self.times = []  # Tempos (ms) dos candidatos, em ordem crescente
+        self.duration = 0  # Duração do vídeo (ms)
+        self.setFixedHeight(12)
+        self.setToolTip("Frames sugeridos (clique para ir até o mais próximo)")
+
+    def set_candidates(self, times):
+
+        self.times = sorted(times)
+        self.update()
+
+    def set_duration(self, duration):
+
+        # Atualiza a duração apenas quando ela muda, evitando redesenhos desnecessários
+        if duration != self.duration:
+            self.duration = duration
+            self.update()
+
+    def x_for_time(self, time):
+
+        return int(time / self.duration * (self.width() - 1))
+
+    def paintEvent(self, event):
+
+        if self.duration <= 0 or not self.times:
+            return
+
+        painter = QPainter(self)
+        pen = QPen(QColor(230, 120, 0))
+        pen.setWidth(2)
+        painter.setPen(pen)
+
+        for time in self.times:
+            x = self.x_for_time(time)
+            painter.drawLine(x, 0, x, self.height())
+
+        painter.end()
+
+    def mousePressEvent(self, event):
+
+        if event.button() != Qt.LeftButton or self.duration <= 0 or not self.times:
+            return
+
+        # Candidato mais próximo da posição clicada
+        time = event.pos().x() / max(1, self.width() - 1) * self.duration
+        position = bisect.bisect_left(self.times, time)
+        nearby = self.times[max(0, position - 1):position + 1]
+
+        self.jump.emit(int(min(nearby, key=lambda t: abs(t - time))))
@@ -0,0 +1,101 @@
+import os
+
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSize
+from PyQt5.QtGui import QPixmap
+
+from ThumbnailCache import ThumbnailLoader
+
+
+class CropListModel(QAbstractListModel):
+
+    # Modelo (model/view do Qt) com os recortes de uma categoria. A view (QListView) só
+    # consulta os dados dos itens visíveis, de modo que as miniaturas são carregadas sob
+    # demanda, à medida que o usuário rola a lista, sem criar widgets para cada recorte
+
+    def __init__(self, paths, thumbnail_cache, thread_pool, parent=None):
+        super().__init__(parent)
+
+        self.paths = list(paths)  # Caminhos dos recortes exibidos
+        self.thumbnail_cache = thumbnail_cache
+        self.thread_pool = thread_pool
+
+        self.pixmaps = {}  # {caminho: QPixmap} das miniaturas já carregadas
+        self.requested = set()  # Caminhos cujas miniaturas já foram solicitadas
+
+        # Miniatura provisória exibida enquanto a definitiva é carregada
+        self.placeholder = QPixmap(thumbnail_cache.size, thumbnail_cache.size)
+        self.placeholder.fill(Qt.lightGray)
+
+    def rowCount(self, parent=QModelIndex()):
+
+        if parent.isValid():
+            return 0
+        return len(self.paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+
+        if not index.isValid():
+            return None
+
+        img_path = self.paths[index.row()]
+
+        if role == Qt.DisplayRole:
+            return os.path.basename(img_path)
+
+        if role == Qt.ToolTipRole:
+            return img_path
+
+        if role == Qt.UserRole:
+            return img_path
+
+        if role == Qt.DecorationRole:
+            pixmap = self.pixmaps.get(img_path)
+            if pixmap is None:
+                self.request_thumbnail(img_path)
+                return self.placeholder
+            return pixmap
+
+        if role == Qt.SizeHintRole:
+            return QSize(self.thumbnail_cache.size + 60, self.thumbnail_cache.size + 40)
+
+        return None
+
+    def request_thumbnail(self, img_path):
+
+        # Solicita (apenas uma vez) o carregamento da miniatura em segundo plano
+        if img_path in self.requested:
+            return
+
+        self.requested.add(img_path)
+        loader = ThumbnailLoader(self.thumbnail_cache, img_path)
+        loader.signals.loaded.connect(self.set_thumbnail)
+        self.thread_pool.start(loader)
+
+    def set_thumbnail(self, img_path, image):
+
+        # Executada na thread da interface quando uma miniatura termina de ser carregada
+        if image.isNull() or img_path not in self.paths:
+            return
+
+        # QPixmap só pode ser criado na thread da interface
+        self.pixmaps[img_path] = QPixmap.fromImage(image)
+
+        row = self.paths.index(img_path)
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def remove_path(self, img_path):
+
+        # Remove apenas o item correspondente ao recorte, sem recarregar a lista inteira
+        if img_path not in self.paths:
+            return False
+
+        row = self.paths.index(img_path)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.paths[row]
+        self.endRemoveRows()
+
+        self.pixmaps.pop(img_path, None)
+        self.requested.discard(img_path)
+
+        return True
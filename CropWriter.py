@@ -0,0 +1,100 @@
+import queue
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.Dataset import Dataset
+
+
+class CropWriter(QThread):
+
+    # Thread responsável por salvar os recortes fora da thread da interface.
+    # A codificação do PNG, a verificação de duplicatas e a atualização do índice de hashes
+    # e dos registros de Augmentation são executadas em segundo plano, permitindo que o
+    # usuário continue navegando no vídeo enquanto os recortes são gravados.
+    #
+    # A fila possui tamanho máximo: caso o disco não acompanhe as capturas, novas submissões
+    # aguardam a liberação de espaço, evitando o acúmulo ilimitado de frames em memória.
+    #
+    # Os índices dos recortes da rajada são reservados pela própria thread (reserve_index) até o
+    # término do salvamento: dois recortes do mesmo frame ainda na fila nunca recebem o mesmo índice
+
+    saved = pyqtSignal(str, str, bool)  # (caminho do recorte, categoria, duplicata)
+    failed = pyqtSignal(str)  # Mensagem de erro
+
+    def __init__(self, max_pending=16):
+        super().__init__()
+
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.dataset = Dataset()
+
+        # Caminhos reservados para recortes ainda não gravados
+        self.reserved = set()
+        self.reserved_lock = threading.Lock()
+
+    def reserve_index(self, folder_name, video_name, frame_number):
+
+        # Retorna o primeiro índice de recorte livre para o frame, considerando tanto os arquivos
+        # já gravados quanto os recortes que ainda aguardam na fila, e o reserva até o salvamento
+        with self.reserved_lock:
+            index = 1
+            while True:
+                path = self.dataset.frame_path_generator(frame_number, folder_name, video_name, index)
+                if path not in self.reserved and not self.dataset.file_exists(path):
+                    self.reserved.add(path)
+                    return index
+                index += 1
+
+    def release(self, folder_name, video_name, frame_number, index):
+
+        # Libera o caminho reservado após o término (ou a falha) do salvamento
+        with self.reserved_lock:
+            self.reserved.discard(self.dataset.frame_path_generator(frame_number, folder_name, video_name, index))
+
+    def submit(self, crop, folder_name, video_name, frame_number, index, coords, dimensions):
+
+        # Adiciona um recorte à fila de salvamento. O recorte deve ser uma cópia,
+        # já que o frame original pode ser alterado enquanto aguarda na fila
+        if not self.isRunning():
+            self.start()
+
+        self.jobs.put((crop, folder_name, video_name, frame_number, index, coords, dimensions))
+
+    def pending(self):
+
+        # Quantidade de recortes aguardando salvamento
+        return self.jobs.qsize()
+
+    def run(self):
+
+        # Laço da thread: salva os recortes na ordem em que foram submetidos,
+        # até receber o sinal de encerramento (None)
+        while True:
+            job = self.jobs.get()
+
+            if job is None:
+                return
+
+            crop, folder_name, video_name, frame_number, index, coords, dimensions = job
+
+            try:
+                frame_path, duplicate = self.dataset.save_capture(crop, folder_name, video_name,
+                                                                  frame_number, index, coords, dimensions)
+            except Exception as error:
+                print(f"Erro ao salvar o recorte de {video_name}: {error}")
+                self.failed.emit(str(error))
+                continue
+            finally:
+                self.release(folder_name, video_name, frame_number, index)
+
+            if frame_path is None:
+                self.failed.emit(f"Não foi possível codificar o recorte de {video_name}")
+            else:
+                self.saved.emit(frame_path, folder_name, duplicate)
+
+    def stop(self):
+
+        # Aguarda o salvamento dos recortes pendentes e encerra a thread
+        if self.isRunning():
+            self.jobs.put(None)
+            self.wait()
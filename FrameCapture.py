@@ -1,5 +1,3 @@
-import os
-
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QScrollArea, QWidget, QMessageBox
 from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QIcon, QTransform
 from PyQt5.QtCore import Qt, QRect, QPoint
@@ -12,7 +10,7 @@ from Model import Model
 class FrameCapture(QDialog):
 
     # Construtor da classe
-    def __init__(self, video_name, current_time, fps, frame, extension):
+    def __init__(self, video_name, current_time, fps, frame, extension, frame_number=None, writer=None):
         super().__init__()
 
         self.setWindowTitle("Capturar frame")  # Define o título da janela
@@ -59,11 +57,21 @@ class FrameCapture(QDialog):
 
         self.layout.addLayout(self.hor_layout2)
 
+        # Label de status, que informa o andamento dos salvamentos sem bloquear a janela
+        self.status_label = QLabel()
+        self.layout.addWidget(self.status_label)
+
         # Inicialização da variáveis globais proveniente dos parâmetros do contrutor
         self.video_name = video_name
         self.current_time = current_time
         self.fps = fps
         self.extension = extension
+        self.writer = writer  # Thread de salvamento dos recortes (CropWriter), quando disponível
+
+        # Índice exato do frame (quando conhecido). Caso contrário, é calculado pelo tempo e FPS
+        if frame_number is None and fps > 0:
+            frame_number = int((current_time / 1000) * fps)
+        self.frame_number = frame_number
 
         # Variáveis referentes aos eventos de seleção
         self.selection_start = None
@@ -92,6 +100,12 @@ class FrameCapture(QDialog):
         self.y2 = None
         self.frameIndex = 0
 
+        # Última seleção salva (em pixels do frame original) e se o frame estava invertido,
+        # reutilizadas pelo modo de captura em rajada da janela principal
+        self.last_roi = None
+        self.last_flipped = False
+        self.flipped = False
+
     #  Função responsável por exibir o frame na área de scroll
     def display_frame(self):
 
@@ -119,6 +133,10 @@ class FrameCapture(QDialog):
         scale_h = target_height / T_height
         scale_factor = min(scale_w, scale_h)
 
+        # O fator de escala é mantido para converter a seleção (feita sobre a imagem
+        # exibida) em coordenadas do frame original
+        self.scale_factor = scale_factor
+
         # Redimensiona
         new_width = int(T_width * scale_factor)
         new_height = int(T_height * scale_factor)
@@ -159,8 +177,10 @@ class FrameCapture(QDialog):
         transform = QTransform().scale(1, -1)  # flip vertical
         self.pixmap = self.pixmap.transformed(transform)
 
-        #Atualiza o frame
+        #Atualiza o frame exibido e o frame original (utilizado no recorte)
         self.frameResized = cv2.flip(self.frameResized, 0)  # 0 = flip vertical
+        self.frame = cv2.flip(self.frame, 0)
+        self.flipped = not self.flipped
 
         # Atualiza no label
         self.image_label.setPixmap(self.pixmap)
@@ -251,94 +271,90 @@ class FrameCapture(QDialog):
         # Atualiza a imagem do label na área de rolagem pela nova imagem desenhada
         self.image_label.setPixmap(temp_pixmap)
 
-    # Função responsável por capturar e salvar a área de seleção definida na imagem
-    # bem como salvar dados para o processo de augmentation futuro
-    def capture_frame(self, folder_name):
+    # Função responsável por converter a seleção (em pixels da imagem exibida)
+    # para pixels do frame exibido, mantendo o recorte quadrado e dentro do frame
+    def source_selection(self):
 
-        # Cria uma instância da classe Model, a fim de utilizar
-        # suas funções. Neste primeiro momento a pasta da categoria
-        # selecionada na janela será criada para alocar os frames
-        model = Model()
-        model.manage_dirs(folder_name)  # Criação das pastas
+        height, width = self.frame.shape[:2]
 
-        # Verificar se a pasta "Augmentation" existe na pasta raiz. Em caso negativo, a função
-        # model.Augmentation_folder_structure() é chamada para criar a estrutura de pastas voltadas
-        # para o processo de Augmentation. (LEVAR ESTE TRECHO PARA O MODEL)
-        if not os.path.exists("Augmentation"):
-            model.Augmentation_folder_structure()
-        else:
-            print("Estrutura de pastas já criada")
+        x1 = int(round(self.x1 / self.scale_factor))
+        y1 = int(round(self.y1 / self.scale_factor))
+        side_length = int(round((self.x2 - self.x1) / self.scale_factor))
+        side_length = min(side_length, width - x1, height - y1)
+
+        return x1, x1 + side_length, y1, y1 + side_length
+
+    # Função responsável por converter a seleção (em pixels do frame exibido) para pixels do vídeo
+    # original. Com a imagem invertida, a seleção corresponde à região espelhada verticalmente do
+    # vídeo: as coordenadas registradas (catálogo e Augmentation) devem apontar para a região real
+    def video_selection(self, x1, x2, y1, y2):
+
+        if not self.flipped:
+            return x1, x2, y1, y2
+
+        height = self.frame.shape[0]
+        return x1, x2, height - y2, height - y1
+
+    # Função responsável por capturar a área de seleção definida na imagem e enviá-la
+    # para salvamento, juntamente com os dados para o processo de augmentation futuro
+    def capture_frame(self, folder_name):
 
         # Valida se há ou não uma área de seleção bem como a existência de um frame antes de prosseguir a captura
         if self.selection_start is None or self.selection_end is None or self.frameResized is None:
             QMessageBox.information(self, 'Erro', 'Nenhuma área selecionada para salvar')
             return 0
 
-        # Recortar a região selecionada na imagem original
-        color_correction = cv2.cvtColor(self.frameResized, cv2.COLOR_BGR2RGB)
-        selected_area = color_correction[self.y1:self.y2, self.x1:self.x2]
+        # Recortar a região selecionada no frame original (resolução nativa do vídeo),
+        # e não na imagem redimensionada para exibição
+        x1, x2, y1, y2 = self.source_selection()
+        selected_area = self.frame[y1:y2, x1:x2]
+        height, width = self.frame.shape[:2]
 
         # Valida se a área recortada possui um tamanho válido
         if selected_area.size == 0:
             QMessageBox.information(self, 'Erro', 'Área selecionada é inválida')
             return 0
 
-        # Cria uma flag para avaliar se a área do frame selecionada na imagem já foi previamente salva
-        # em algumas das possíveis categorias. Caso alguma imagem duplicada seja encontrada, ela é removida
-        # salvando apenas o frame atual na categoria atual selecionada
-        if selected_area is None:
-            print("Erro: área selecionada é None")
-        flag = model.check_existence(selected_area, self.video_name)
-        # Caso o frame não seja encontrado e duplicadom, o index é incrementado
-        # O frameIndex, define o valor do subframe (trecho da imagem) recortado
+        # O frameIndex define o valor do subframe (trecho da imagem) recortado
         # ex: frame1_recorte1, frame1_recorte2, frame1_recorte3, etc.
-
-        print('Flag', flag)
-
-        if not flag:
-            self.frameIndex += 1
+        # O índice é o primeiro livre para o frame e a classe, considerando os recortes já salvos
+        # (inclusive pela captura em rajada) e os que ainda aguardam na fila de salvamento
+        if self.writer is not None:
+            self.frameIndex = self.writer.reserve_index(folder_name, self.video_name, self.frame_number)
         else:
+            model = Model()
+            self.frameIndex = 1
+            while model.file_exists(model.frame_path_generator(self.frame_number, folder_name,
+                                                               self.video_name, self.frameIndex)):
+                self.frameIndex += 1
+
+        # Coordenadas no vídeo original (desfazendo a inversão da imagem, quando aplicada)
+        coords = self.video_selection(x1, x2, y1, y2)
+
+        # Mantém a seleção (em pixels do vídeo original) para o modo de captura em rajada
+        self.last_roi = coords
+        self.last_flipped = self.flipped
+
+        # O recorte é copiado, já que a fatia referencia o frame exibido (que pode ser invertido)
+        job = (selected_area.copy(), folder_name, self.video_name, self.frame_number,
+               self.frameIndex, coords, (width, height))
+
+        if self.writer is not None:
+            # Salvamento em segundo plano: a janela continua disponível para novas seleções
+            self.writer.submit(*job)
+            self.status_label.setText(f"Recorte {self.frameIndex} enviado para '{folder_name}'")
+            return 1
+
+        # Sem o salvamento em segundo plano, o recorte é salvo imediatamente
+        frame_path, duplicate = Model().save_capture(*job)
+
+        if frame_path is None:
+            QMessageBox.information(self, 'Erro', 'Não foi possível salvar o recorte')
+            return 0
+
+        if duplicate:
             QMessageBox.information(self, 'Erro', 'Frame selecionado já foi préviamente salvo, apenas o '
                                                   'salvamento atual foi mantido')
 
-        # Gerar o caminho do frame a ser salvo, levando em consideração o numero do frme,
-        # nome da pasta, nome do vídeo e índice do recorte
-        frame_path = model.frame_path_generator(self.fps,
-                                                self.current_time,
-                                                folder_name,
-                                                self.video_name,
-                                                self.frameIndex)
-
-        # Salvar a imagem e exibir mensagem ao usuário
-        success = cv2.imwrite(frame_path, selected_area)
-
-        # Valida se o salvamento foi realizado com sucesso
-        if success:
-
-            # Calcula o valor do frame, baseado no tempo atual e na taxa de quadros
-            frame_number = int((self.current_time / 1000) * self.fps)
-
-            aug_list = []
-            # O 'for' busca obter os 10 frames anteriores e posteriores
-            # ao frame atual, afim de salvar seus dados para o processo
-            # de Augmentation futuro
-            for i in range(-10, 11):
-                if frame_number + i >= 1 and i != 0:
-                # Retorna a estrutura dos dados em formato JSON
-                    aug_data = model.Augmentation_data_structure(frame_number + i,
-                                                                 self.x1,
-                                                                 self.x2,
-                                                                 self.y1,
-                                                                 self.y2,
-                                                                 self.video_name,
-                                                                 frame_path)
-                    aug_list.append(aug_data)
-
-            # Verifica duplicatas nas pastas de augmentation e as exclui em caso afirmativo
-            model.Augmentation_data_checker(aug_list)
-
-            # Salva a estrutura JSON no arquivo gerado na pasta Augmentation
-            model.Augmentation_data_save(aug_list, folder_name)
-
-            # Mensagem de confirmação da operação
-            QMessageBox.information(self, "Sucesso", f"Frame salvo em: {frame_path}")
+        self.status_label.setText(f"Frame salvo em: {frame_path}")
+        return 1
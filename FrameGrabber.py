@@ -0,0 +1,232 @@
+import threading
+from collections import deque
+
+import cv2
+
+
+class FrameGrabber:
+
+    # Classe responsável por obter os frames do vídeo diretamente em memória (arrays NumPy),
+    # sem depender do snapshot do VLC gravado em disco. Um decodificador do OpenCV é mantido
+    # aberto para o mesmo arquivo reproduzido pelo VLC.
+    #
+    # Os frames decodificados ficam em um buffer circular (deque com tamanho máximo), preenchido
+    # por uma thread decodificadora ao redor do frame solicitado (a "cabeça de leitura"). Assim,
+    # avançar e retroceder frames passa a ser uma consulta ao buffer, exata e sem depender
+    # do reposicionamento por keyframes do VLC.
+
+    def __init__(self, capacity=60):
+
+        self.capacity = capacity  # Quantidade máxima de frames mantidos em memória
+
+        # A janela do buffer privilegia os frames anteriores à cabeça de leitura, já que
+        # retroceder é a operação mais custosa para o decodificador
+        self.behind = (capacity * 2) // 3
+        self.ahead = capacity - self.behind - 1
+
+        self.capture = None  # Decodificador do OpenCV
+        self.file_name = None  # Caminho do vídeo aberto no decodificador
+        self.fps = 0
+
+        # Tabela de timestamps do vídeo (FrameIndex). Enquanto não estiver disponível,
+        # os índices são estimados pelo tempo e pelo FPS
+        self.frame_index = None
+        self.resync = False  # Indica que o índice do próximo frame deve ser obtido pelo timestamp
+        self.seek_margin = 0  # Frames extras de recuo, caso o reposicionamento ultrapasse o frame pedido
+
+        self.frames = deque(maxlen=capacity)  # Buffer circular de (índice, tempo em ms, frame)
+        self.condition = threading.Condition()
+        self.target = None  # Índice do frame solicitado pela interface
+        self.next_index = 0  # Índice do próximo frame a ser lido pelo decodificador
+        self.end_index = None  # Índice do fim do vídeo (quando alcançado)
+        self.running = False
+        self.thread = None
+
+    def open(self, file_name):
+
+        # Abre (ou reabre) o decodificador para o arquivo de vídeo indicado
+        self.release()
+        capture = cv2.VideoCapture(file_name)
+
+        if not capture.isOpened():
+            print(f"Erro ao abrir o decodificador para {file_name}")
+            return False
+
+        self.capture = capture
+        self.file_name = file_name
+        self.fps = capture.get(cv2.CAP_PROP_FPS)
+        self.frame_index = None
+        self.resync = False
+        self.seek_margin = 0
+        self.next_index = 0
+        self.end_index = None
+        self.running = True
+
+        self.thread = threading.Thread(target=self.decode_loop, daemon=True)
+        self.thread.start()
+
+        return True
+
+    def set_frame_index(self, frame_index):
+
+        # Associa a tabela de timestamps do vídeo (construída em segundo plano). Uma tabela vazia
+        # (vídeo que o OpenCV não decodifica) é ignorada, mantendo a estimativa por FPS em index_for_time
+        if len(frame_index) == 0:
+            return
+
+        with self.condition:
+            self.frame_index = frame_index
+            self.end_index = len(frame_index)
+            self.condition.notify_all()
+
+    def index_for_time(self, current_time):
+
+        # Converte um tempo (ms) no índice do frame correspondente, utilizando
+        # a tabela de timestamps quando disponível
+        if self.frame_index is not None:
+            return self.frame_index.frame_for_time(current_time)
+
+        if self.fps > 0:
+            return int((current_time / 1000) * self.fps)
+        return 0
+
+    def lookup(self, index):
+
+        # Procura o frame 'index' no buffer (deve ser chamada com o lock adquirido).
+        # Os índices do buffer são sempre consecutivos, então a busca é direta
+        if not self.frames:
+            return None
+
+        position = index - self.frames[0][0]
+        if 0 <= position < len(self.frames):
+            return self.frames[position]
+
+        return None
+
+    def needs_decode(self):
+
+        # Indica se a thread decodificadora precisa ler mais frames para
+        # cobrir a janela ao redor da cabeça de leitura
+        if self.target is None or self.capture is None:
+            return False
+
+        if self.end_index is not None and self.target >= self.end_index:
+            return False
+
+        if self.lookup(self.target) is None:
+            return True
+
+        last_needed = self.target + self.ahead
+        if self.end_index is not None:
+            last_needed = min(last_needed, self.end_index - 1)
+
+        return self.frames[-1][0] < last_needed
+
+    def get(self, index, timeout=2.0):
+
+        # Retorna (índice, tempo em ms, frame) do frame solicitado, aguardando
+        # a thread decodificadora caso ele ainda não esteja no buffer
+        if self.capture is None or index < 0:
+            return None
+
+        with self.condition:
+            self.target = index
+            self.condition.notify_all()
+
+            self.condition.wait_for(lambda: self.lookup(index) is not None or not self.needs_decode()
+                                    or not self.running, timeout)
+
+            entry = self.lookup(index)
+
+        if entry is None:
+            return None
+
+        frame_index, frame_time, frame = entry
+        return frame_index, frame_time, frame.copy()
+
+    def grab(self, current_time):
+
+        # Retorna o frame (BGR) correspondente ao tempo 'current_time' (em ms)
+        # ou None caso não seja possível decodificá-lo
+        entry = self.get(self.index_for_time(current_time))
+
+        if entry is None:
+            return None
+
+        return entry[2]
+
+    def decode_loop(self):
+
+        # Laço da thread decodificadora: lê frames sequencialmente enquanto a janela ao redor
+        # da cabeça de leitura não estiver completa, reposicionando o decodificador apenas
+        # quando o frame solicitado estiver fora do alcance da leitura sequencial
+        while True:
+
+            with self.condition:
+                self.condition.wait_for(lambda: not self.running or self.needs_decode())
+
+                if not self.running:
+                    return
+
+                target = self.target
+                sequential = self.frames and self.lookup(target) is not None or \
+                    self.next_index <= target <= self.next_index + self.capacity
+
+                if not sequential:
+                    start = max(0, target - self.behind - self.seek_margin)
+                    self.frames.clear()
+                    self.next_index = start
+                    frame_index = self.frame_index
+
+            # A decodificação é feita fora do lock, para não bloquear a interface.
+            # Com a tabela de timestamps, o reposicionamento é feito pelo tempo exato do frame
+            # e o índice do primeiro frame lido é confirmado pelo seu timestamp
+            if not sequential:
+                if frame_index is not None and start > 0:
+                    self.capture.set(cv2.CAP_PROP_POS_MSEC, frame_index.time_for_frame(start))
+                    self.resync = True
+                else:
+                    self.capture.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+            ok, frame = self.capture.read()
+            frame_time = self.capture.get(cv2.CAP_PROP_POS_MSEC)
+
+            with self.condition:
+                if ok and self.resync and self.frame_index is not None:
+                    self.next_index = self.frame_index.frame_for_time(frame_time)
+
+                    # Caso o decodificador tenha parado após o frame pedido, os próximos
+                    # reposicionamentos recuam mais frames, evitando um novo erro
+                    if self.next_index > self.target:
+                        self.seek_margin += self.capacity
+                    else:
+                        self.seek_margin = 0
+                self.resync = False
+
+                if ok:
+                    self.frames.append((self.next_index, frame_time, frame))
+                    self.next_index += 1
+                else:
+                    self.end_index = self.next_index
+
+                self.condition.notify_all()
+
+    def release(self):
+
+        # Encerra a thread decodificadora e libera o decodificador atual (caso exista)
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+
+        if self.thread is not None:
+            self.thread.join()
+
+        if self.capture is not None:
+            self.capture.release()
+
+        self.capture = None
+        self.file_name = None
+        self.thread = None
+        self.target = None
+        self.frame_index = None
+        self.frames.clear()
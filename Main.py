@@ -1,5 +1,7 @@
 import sys
 
+from StartupTimer import startup_timer
+
 from PyQt5.QtWidgets import QApplication
 
 from VideoPlayer import VideoPlayer
@@ -7,11 +9,14 @@ from VideoPlayer import VideoPlayer
 
 class Main:
     def __init__(self):
+        startup_timer.mark("Módulos importados")
         self.app = QApplication(sys.argv)
-        self.player = VideoPlayer()
+        self.player = VideoPlayer(report_timing=startup_timer.enabled(sys.argv))
+        startup_timer.mark("Janela criada")
 
     def run(self):
         self.player.show()
+        startup_timer.mark("Janela exibida")
         sys.exit(self.app.exec())
 
 
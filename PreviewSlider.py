@@ -0,0 +1,80 @@
+from PyQt5.QtWidgets import QSlider, QLabel, QStyle, QStyleOptionSlider
+from PyQt5.QtGui import QPixmap
+from PyQt5.QtCore import Qt, QPoint
+
+
+class PreviewSlider(QSlider):
+
+    # Barra de rolagem do vídeo com pré-visualização ao passar o mouse. As miniaturas são
+    # recortadas do sprite do vídeo (core.SpriteSheet), já carregado em memória, de forma que
+    # nenhuma decodificação ou reposicionamento do VLC ocorre durante a pré-visualização
+
+    def __init__(self, orientation=Qt.Horizontal):
+        super().__init__(orientation)
+
+        self.sprite = None  # Dados do sprite (SpriteSheet)
+        self.sprite_pixmap = None  # Imagem do sprite
+        self.duration = 0  # Duração do vídeo (ms)
+
+        # Janela flutuante (sem bordas) que exibe a miniatura acima da barra
+        self.preview = QLabel(self, Qt.ToolTip)
+        self.preview.setStyleSheet("border: 1px solid black;")
+
+        self.setMouseTracking(True)
+
+    def set_sprite(self, sprite):
+
+        # Associa o sprite do vídeo atual (ou None para desativar a pré-visualização)
+        self.sprite = sprite
+        self.sprite_pixmap = None
+
+        if sprite is not None and sprite.image_path is not None:
+            pixmap = QPixmap(sprite.image_path)
+            if not pixmap.isNull():
+                self.sprite_pixmap = pixmap
+
+        self.preview.hide()
+
+    def set_duration(self, duration):
+
+        self.duration = duration
+
+    def value_at(self, x):
+
+        # Converte a posição horizontal do mouse no valor correspondente do slider,
+        # considerando a área útil da barra (descontando a largura do marcador)
+        option = QStyleOptionSlider()
+        self.initStyleOption(option)
+        groove = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderGroove, self)
+        handle = self.style().subControlRect(QStyle.CC_Slider, option, QStyle.SC_SliderHandle, self)
+
+        start = groove.x() + handle.width() // 2
+        span = groove.width() - handle.width()
+
+        return QStyle.sliderValueFromPosition(self.minimum(), self.maximum(), x - start, span)
+
+    def mouseMoveEvent(self, event):
+
+        super().mouseMoveEvent(event)
+
+        duration = self.duration or (self.sprite.duration if self.sprite is not None else 0)
+        if self.sprite_pixmap is None or duration <= 0:
+            return
+
+        time = self.value_at(event.pos().x()) / self.maximum() * duration
+        rect = self.sprite.tile_rect(time)
+        if rect is None:
+            return
+
+        self.preview.setPixmap(self.sprite_pixmap.copy(*rect))
+        self.preview.adjustSize()
+
+        # Posiciona a miniatura centralizada no mouse, acima da barra
+        position = self.mapToGlobal(QPoint(event.pos().x() - self.preview.width() // 2, -self.preview.height() - 4))
+        self.preview.move(position)
+        self.preview.show()
+
+    def leaveEvent(self, event):
+
+        self.preview.hide()
+        super().leaveEvent(event)
@@ -1,7 +1,10 @@
-from PyQt5.QtGui import QPixmap, QIcon
-from PyQt5.QtWidgets import QDialog, QVBoxLayout, QScrollArea, QWidget, QPushButton, QLabel, QGridLayout, QMessageBox
+from PyQt5.QtCore import Qt, QThreadPool, QSize
+from PyQt5.QtGui import QIcon, QKeySequence
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QPushButton, QMessageBox, QTabWidget, QListView, QShortcut
 
+from CropListModel import CropListModel
 from Model import Model
+from ThumbnailCache import ThumbnailCache
 
 
 class SaveMenu(QDialog):
@@ -15,9 +18,13 @@ class SaveMenu(QDialog):
         self.setWindowTitle("Menu de salvamento")  # Define o título da janela
         self.setGeometry(150, 150, 800, 600)  # Define as dimensões da janela criada
 
+        # Instância única do Model (e do catálogo de recortes) utilizada pela janela: o catálogo é
+        # aberto e sincronizado com as pastas uma única vez, e fechado ao fechar a janela
+        self.model = Model()
+        self.finished.connect(self.model.close_catalog)
+
         # Definindo um ícone para a janela
-        model = Model()
-        self.setWindowIcon(QIcon(model.resource_path("figures/fig_save_menu.png")))
+        self.setWindowIcon(QIcon(self.model.resource_path("figures/fig_save_menu.png")))
 
         # Layout principal do QDialog
         # Em um QDialog, para que os widgets apareçam, é necessário
@@ -34,22 +41,22 @@ class SaveMenu(QDialog):
             "Muita dor": "Muita dor"
         }
 
-        # Criar uma área de rolagem para exibir imagens, independente do tamanho da janela
-        # Instância da área de rolagem (associada à propria instância da janela - self)
-        self.scroll_area = QScrollArea(self)
-        # O QScrollArea sozinho não exibe widgets diretamente. Ele precisa de um widget interno
-        self.scroll_widget = QWidget()
-        # Criação de um layout vertical (QVBoxLayout) para organizar os elementos dentro do scroll_widget
-        self.scroll_layout = QVBoxLayout(self.scroll_widget)
-        # Permite que o conteúdo interno (self.scroll_widget) seja redimensionado para caber na QScrollArea
-        self.scroll_area.setWidgetResizable(True)
-        # Associando o widget que contém nosso layout de imagens à área de rolagem
-        self.scroll_area.setWidget(self.scroll_widget)
-        # Adicionar a área de rolagem ao layout principal
-        self.layout.addWidget(self.scroll_area)
+        # Cada categoria é exibida em uma aba própria, contendo uma lista (QListView) em modo de ícones.
+        # Diferente de um QGridLayout com widgets, a view só desenha as células visíveis,
+        # mantendo o consumo de memória constante independente do número de recortes
+        self.tabs = QTabWidget(self)
+        self.layout.addWidget(self.tabs)
 
         # ---------------------------------------------------------------------------------------------------------------------------
 
+        self.delete_btn = QPushButton("Excluir recortes selecionados")  # Cria um botão para excluir o recorte
+        self.layout.addWidget(self.delete_btn)  # Adiciona o botão ao layout principal da janela
+        self.delete_btn.clicked.connect(self.delete_selected)  # Atribui a função de exclusão ao botão
+
+        # A tecla 'Delete' também exclui o recorte selecionado
+        self.delete_shortcut = QShortcut(QKeySequence(Qt.Key_Delete), self)
+        self.delete_shortcut.activated.connect(self.delete_selected)
+
         self.close_btn = QPushButton("Fechar")  # Cria um botão para fechar a janela
         self.layout.addWidget(self.close_btn)  # Adiciona o botão ao layout principal da janela
         self.close_btn.clicked.connect(self.close)  # Atribui a função de fechar a janela ao botão
@@ -58,143 +65,103 @@ class SaveMenu(QDialog):
 
         # Recebe o nome do vídeo atual
         self.videoName = video_name
-        # Chamada de função responsáverl por carregar imagens das pastas
-        self.load_images()
-
-    # A função a seguir serve para quando é necessário atualizar um layout removendo os
-    # elementos antigos antes de adicionar novos.
-    def clear_layout(self, layout):
 
-        # layout.count() retorna o número de widgets ou sublayouts dentro do layout.
-        # O while garante que os elementos continuem sendo removidos até que não reste nenhum.
-        while layout.count():
+        # Cache de miniaturas em disco e conjunto de threads responsáveis por carregá-las
+        # em segundo plano, permitindo que a janela seja exibida imediatamente
+        self.thumbnail_cache = ThumbnailCache()
+        self.thread_pool = QThreadPool()
 
-            # Remove o primeiro item do layout e o retorna
-            # É importante ressaltar que Remove o QLayout pode
-            # conter tanto widgets (QWidget) quanto
-            # sublayouts (QLayout), é necessário verificar o que foi removido.
-            item = layout.takeAt(0)
+        # Modelos e views de cada categoria: {categoria: (modelo, view)}
+        self.views = {}
 
-            # Verifica se o item é um widget
-            if item.widget():
-                # Remove o widget da memória de forma segura.
-                # O deleteLater() é usado no PyQt para evitar
-                # problemas de acesso a objetos deletados prematuramente.
-                item.widget().deleteLater()
+        # Chamada de função responsáverl por carregar imagens das pastas
+        self.load_images()
 
-            # Verifica se o item é layout
-            elif item.layout():
+    def list_images(self, path):
 
-                # A propria função é chamada recursivamente de forma a limpar todos
-                # os widgets contidos nele
-                self.clear_layout(item.layout())
-                item.layout().deleteLater()  # Remove o layout da memória após limpá-lo.
+        # Retorna o caminho de todas as imagens da pasta 'path' referentes ao vídeo atual.
+        # Os recortes são obtidos do catálogo, pelo nome exato do vídeo (sem percorrer a pasta)
+        return self.model.list_crops(self.videoName, path)
 
     def load_images(self):
 
-        # Limpa os widgets existentes no layout antes de recarregar novas imagens.
-        # Evitando que a interface acumule elementos repetidos
-        self.clear_layout(self.scroll_layout)
-        model = Model()
+        # Monta uma aba para cada categoria existente. Apenas os caminhos dos arquivos são
+        # listados aqui; as miniaturas são carregadas pelo modelo conforme ficam visíveis
+        model = self.model
+        self.tabs.clear()
+        self.views = {}
 
-        # Percorre cada um dos itens do dicionário das pastas (retornando a categoria e o caminho)
-        # possibilitando a realização do processo de carregamento de imagens para cada uma das pastas
         for category, path in self.folders.items():
 
             # Se a pasta não existir no caminho definido em 'path'
             # o algoritmo pula a pasta e continua a execução
-
             if not model.file_exists(path):
                 continue
 
-            # Adiciona um layout como título para cada categoria
-            # o label recebe o nome da categoria obtido pela
-            # variável 'category' proveniente do dicionário
-
-            category_label = QLabel(f"<b>{category}</b>")
-            self.scroll_layout.addWidget(category_label)
-
-            # Criar um layout de grade para organizar as imagens
-            # A grid é definida para cada uma das pastas
-
-            grid_layout = QGridLayout()
-            row, col = 0, 0  # Inicia a posição da primeira imagem na linha 0, coluna 0.
-
-            # O loop percorre todos os itens em uma determinada pasta
-            # definida por 'path'
-            for img_file in model.list_directory(path):
-
-                # Valida quais arquivos são referentes ao vídeo atual
-                if self.videoName in img_file:
-
-                    # Obtém o caminho completo do arquivo (unindo path com o nome do arquivo de imagem)
-                    img_path = model.join_path(img_file, path)
-
-                    if not model.validate_type(img_file):
-                        continue
-
-                    # Criar um QLabel para exibir a imagem
-                    # Para isso é utilizado um pixmap, o qual é
-                    # designado para exibir imagens de modo otimizado
-                    # sem ter foco na manipulação da imagem
-
-                    pixmap = QPixmap(img_path).scaled(100, 100)  # Instância do pixmap da imagem atual
-                    img_label = QLabel()  # Instância de uma label que contém o pixmap
-                    img_label.setPixmap(pixmap)  # Associa o pixmap ao label da imagem
-
-                    # Criar um botão para excluir a imagem
-                    delete_button = QPushButton("Excluir")
-
-                    # Ao ser pressionado o botão chama a função delete_image
-                    # Lambda permite a chamada de uma função com parâmetros
+            list_model = CropListModel(self.list_images(path), self.thumbnail_cache, self.thread_pool, self)
+
+            view = QListView()
+            view.setViewMode(QListView.IconMode)  # Exibição em grade (ícones)
+            view.setResizeMode(QListView.Adjust)  # Reorganiza a grade ao redimensionar a janela
+            view.setMovement(QListView.Static)
+            view.setUniformItemSizes(True)  # Permite calcular o layout sem consultar todos os itens
+            view.setLayoutMode(QListView.Batched)  # Distribui o layout de listas grandes em lotes
+            view.setIconSize(QSize(self.thumbnail_cache.size, self.thumbnail_cache.size))
+            view.setSpacing(10)
+            view.setWordWrap(True)
+            view.setSelectionMode(QListView.ExtendedSelection)  # Permite excluir vários recortes de uma vez
+            view.setModel(list_model)
+
+            self.tabs.addTab(view, f"{category} ({list_model.rowCount()})")
+            self.views[category] = (list_model, view)
+
+    def delete_selected(self):
+
+        # Exclui os recortes selecionados na aba atual (seleção múltipla com Ctrl/Shift)
+        view = self.tabs.currentWidget()
+        if view is None or not view.selectionModel().selectedIndexes():
+            QMessageBox.information(self, 'Erro', 'Nenhum recorte selecionado')
+            return 0
 
-                    # Observação:
-                    # O evento clicked do botão envia automaticamente um argumento booleano (checked)
-                    # O checked não é usado, mas precisa estar no lambda para evitar erros, uma vez que
-                    # alguns widgets no PyQt podem funcionar como botões de alternância (toggle buttons),
-                    # enviando True quando ativados e False quando desativados. Mesmo que o nosso botão não
-                    # use isso, o PyQt exige que esse argumento seja tratado.
-                    delete_button.clicked.connect(lambda checked, p=img_path: self.delete_image(p))
+        paths = [index.data(Qt.UserRole) for index in view.selectionModel().selectedIndexes()]
 
-                    # Label para exibir o nome de cada frame
-                    frame_name = QLabel()
-                    frame_name.setText(f"{img_file}")
+        if len(paths) > 1:
+            answer = QMessageBox.question(self, 'Confirmação', f'Excluir os {len(paths)} recortes selecionados?')
+            if answer != QMessageBox.Yes:
+                return 0
 
-                    # Adicionar a imagem do frame e o botão de deleção
-                    # ao layout da grid, definindo a linha e a coluna
-                    # da grid onde será a inserção
-                    grid_layout.addWidget(frame_name, row, col)
-                    grid_layout.addWidget(img_label, row + 1, col)
-                    # A inclusão do botão vem na linha inferior de onde a imagem está alocada
-                    grid_layout.addWidget(delete_button, row + 2, col)
+        return self.delete_images(paths)
 
-                    # Aqui é feito o controle da disposição das imagens
-                    # A coluna é incrementada após a inserção da primeira imagem
-                    col += 1
-                    # Caso já tenham 5 colunas de imagens (0,1,2,3,4)
-                    # a proxima imagem é inserida na próxima linha da grid
-                    # resetando o valor da coluna
-                    if col > 4:
-                        col = 0
-                        row += 3
+    def delete_images(self, img_paths):
 
-            # Após a definição e organização da grid, o seu layout
-            # é inserido ao scroll de rolagem
-            self.scroll_layout.addLayout(grid_layout)
+        # Exclui os recortes informados: arquivos, entradas do catálogo (em uma única transação)
+        # e registros de Augmentation (uma única escrita por classe afetada)
+        model = self.model
+        deleted = []
 
-    def delete_image(self, img_path):
+        for img_path in img_paths:
+            try:
+                model.remove_file(img_path)  # Remove o arquivo
+                deleted.append(img_path)
+            except Exception as e:  # Em caso de erro
+                print(f"Erro ao excluir {img_path}: {e}")
 
-        model = Model()
         try:
-            model.remove_file(img_path)  # Remove o arquivo
-            model.Augmentation_data_delete(img_path) # Função para deletar os dados JSON de um frame excluido
-            self.load_images()  # Recarrega a interface após a exclusão
-
-            QMessageBox.information(self, 'Resultado', 'Imagem excluída com sucesso do diretório e do '
-                                                       'arquivo de Augmentation')
-            return 0
-
-        except Exception as e:  # Em caso de erro
-            print(f"Erro ao excluir {img_path}: {e}")
-            QMessageBox.information(self, 'Erro', 'Erro ao remover a imagem')
-            return 0
\ No newline at end of file
+            classes = model.unregister_crops(deleted)  # Remove os recortes do catálogo
+            model.Augmentation_data_delete(deleted, classes)  # Remove os dados JSON dos frames excluídos
+        except Exception as e:
+            print(f"Erro ao atualizar os registros dos recortes excluídos: {e}")
+            QMessageBox.information(self, 'Erro', 'Erro ao remover os registros das imagens')
+
+        # Remove apenas os itens excluídos da lista, sem recarregar as demais categorias
+        for category, (list_model, view) in self.views.items():
+            changed = [img_path for img_path in deleted if list_model.remove_path(img_path)]
+            if changed:
+                self.tabs.setTabText(self.tabs.indexOf(view), f"{category} ({list_model.rowCount()})")
+
+        if len(deleted) != len(img_paths):
+            QMessageBox.information(self, 'Erro', f'Erro ao remover {len(img_paths) - len(deleted)} imagem(ns)')
+        else:
+            QMessageBox.information(self, 'Resultado', f'{len(deleted)} imagem(ns) excluída(s) com sucesso do '
+                                                       'diretório e do arquivo de Augmentation')
+        return 0
@@ -0,0 +1,49 @@
+import os
+import time
+
+
+class StartupTimer:
+
+    # Classe responsável por registrar o tempo de cada etapa da inicialização do programa
+    # (importações, criação da janela, carregamento do VLC e do OpenCV), permitindo
+    # identificar regressões no tempo de abertura do aplicativo.
+    # O relatório é gerado quando a variável de ambiente FRAMECAPTURER_TIMING=1 está definida
+    # ou quando o programa é iniciado com o argumento --timing
+
+    def __init__(self, report_path="startup_timing.log"):
+
+        self.start = time.perf_counter()
+        self.report_path = report_path
+        self.marks = []  # [(etapa, segundos desde o início)]
+
+    def enabled(self, argv=()):
+
+        return os.environ.get("FRAMECAPTURER_TIMING") == "1" or "--timing" in argv
+
+    def mark(self, step):
+
+        # Registra o tempo decorrido desde o início até a etapa informada
+        self.marks.append((step, time.perf_counter() - self.start))
+
+    def report(self):
+
+        # Gera o relatório em texto. O relatório também é salvo em arquivo, já que
+        # a versão compilada (PyInstaller) não possui saída no terminal
+        lines = ["Tempo de inicialização:"]
+        previous = 0.0
+
+        for step, elapsed in self.marks:
+            lines.append(f"  {step:<35} {elapsed * 1000:8.1f} ms  (+{(elapsed - previous) * 1000:.1f} ms)")
+            previous = elapsed
+
+        text = "\n".join(lines)
+        print(text)
+
+        with open(self.report_path, "a", encoding="utf-8") as file:
+            file.write(time.strftime("%Y-%m-%d %H:%M:%S") + "\n" + text + "\n\n")
+
+        return text
+
+
+# Instância única, criada na primeira importação do módulo (início do programa)
+startup_timer = StartupTimer()
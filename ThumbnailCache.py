@@ -0,0 +1,73 @@
+import os
+import hashlib
+
+from PyQt5.QtCore import Qt, QObject, QRunnable, pyqtSignal
+from PyQt5.QtGui import QImage
+
+
+class ThumbnailCache:
+
+    # Classe responsável por manter em disco miniaturas (JPEG) dos recortes salvos.
+    # Cada miniatura é identificada pelo caminho, data de modificação e tamanho do arquivo
+    # original, de forma que um recorte alterado gera automaticamente uma nova miniatura
+
+    def __init__(self, cache_dir=".thumbnails", size=100):
+
+        self.cache_dir = cache_dir
+        self.size = size
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def cached_path(self, img_path):
+
+        # Retorna o caminho da miniatura correspondente ao estado atual do arquivo
+        stat = os.stat(img_path)
+        key = f"{os.path.abspath(img_path)}|{stat.st_mtime_ns}|{stat.st_size}|{self.size}"
+
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+    def load(self, img_path):
+
+        # Retorna a miniatura (QImage) do recorte, gerando-a caso ainda não exista.
+        # QImage (diferente de QPixmap) pode ser utilizado fora da thread da interface
+        try:
+            thumb_path = self.cached_path(img_path)
+        except OSError:
+            return QImage()
+
+        if os.path.exists(thumb_path):
+            image = QImage(thumb_path)
+            if not image.isNull():
+                return image
+
+        image = QImage(img_path)
+        if image.isNull():
+            return image
+
+        image = image.scaled(self.size, self.size, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        image.save(thumb_path, "JPG", 85)
+
+        return image
+
+
+class ThumbnailSignals(QObject):
+
+    # QRunnable não herda de QObject, por isso os sinais ficam em uma classe auxiliar
+    loaded = pyqtSignal(str, QImage)
+
+
+class ThumbnailLoader(QRunnable):
+
+    # Tarefa executada no QThreadPool, responsável por carregar a miniatura
+    # de um recorte e enviá-la à interface por meio do sinal 'loaded'
+
+    def __init__(self, cache, img_path):
+        super().__init__()
+
+        self.cache = cache
+        self.img_path = img_path
+        self.signals = ThumbnailSignals()
+
+    def run(self):
+
+        image = self.cache.load(self.img_path)
+        self.signals.loaded.emit(self.img_path, image)
@@ -2,18 +2,24 @@ import os
 import sys
 import ctypes
 import time
-import cv2
+import bisect
+import threading
+from collections import deque
 
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QKeySequence, QFont, QIcon, QPixmap
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QKeySequence, QFont, QIcon, QPixmap, QImage
 from PyQt5.QtMultimediaWidgets import QVideoWidget
 from PyQt5.QtWidgets import QMainWindow, QPushButton, QSlider, QWidget, QVBoxLayout, \
-    QHBoxLayout, QLabel, QShortcut, QApplication, QMessageBox
+    QHBoxLayout, QLabel, QShortcut, QApplication, QMessageBox, QStackedWidget, QCheckBox, QSpinBox
 
-from KeyMapper import KeyMapper
 from Model import Model
-from SaveMenu import SaveMenu
-from FrameCapture import FrameCapture
+from CropWriter import CropWriter
+from CandidateBar import CandidateBar
+from PreviewSlider import PreviewSlider
+from StartupTimer import startup_timer
+
+# Observação: KeyMapper, SaveMenu, FrameCapture, FrameGrabber e FrameIndex (e, com eles, o OpenCV)
+# são importados apenas quando utilizados, reduzindo o tempo até a exibição da janela principal
 
 
 # PyQt5.QtWidgets contém os elemenos da interface gráfica, como botões, janelas e sliders
@@ -34,7 +40,7 @@ from FrameCapture import FrameCapture
 # QGridLayout -
 # O módulo QtCore contém funcionalidades não gráficas, como controle de tempo, eventos e manipulação de dados.
 # Qt - Enumerações e constantes do Qt, como: Qt.AlignTop → Alinha um widget no topo.
-# QTimer - Cria eventos recorrentes, como atualização de tempo ou animações.
+# pyqtSignal - Define sinais, utilizados para repassar eventos de outras threads (VLC) à interface.
 # O módulo QtGui lida com elementos gráficos, como fontes, cores e atalhos de teclado.
 # QKeySequence - Representa atalhos de teclado, como "Ctrl+S" ou "Alt+F4"
 # QFont - Define e personaliza fontes de texto.
@@ -51,11 +57,29 @@ from FrameCapture import FrameCapture
 
 class VideoPlayer(QMainWindow):
 
-    def __init__(self):
+    # Sinal emitido pela thread de inicialização quando o VLC e o OpenCV terminam de ser carregados
+    warm_up_finished = pyqtSignal()
+
+    # Sinal emitido pela thread de análise de movimento: (arquivo, tempos dos frames sugeridos)
+    candidates_ready = pyqtSignal(str, list)
+
+    # Sinal emitido pela thread de geração do sprite de miniaturas: (arquivo, SpriteSheet)
+    sprite_ready = pyqtSignal(str, object)
+
+    # Sinal emitido pela thread de geração do proxy: (arquivo original, caminho do proxy ou "")
+    proxy_ready = pyqtSignal(str, str)
+
+    # Sinais emitidos pelos eventos do VLC (executados em uma thread do VLC): tempo atual e duração (ms)
+    time_changed = pyqtSignal(int)
+    length_changed = pyqtSignal(int)
+
+    def __init__(self, report_timing=False):
 
         # Herda os métodos da classe pai (QMainWindow)
         super().__init__()
 
+        self.report_timing = report_timing  # Indica se o relatório de inicialização deve ser gerado
+
         self.map_window = None
         self.setWindowTitle("Video Player com VLC")  # Define o título da janela do player
         self.setGeometry(100, 100, 900, 500)  # Define a geometria da janela
@@ -74,9 +98,19 @@ class VideoPlayer(QMainWindow):
 
         # Cria um novo widget dedicado para o player de vídeo
         self.video_widget = QVideoWidget()  # Cria uma instância do QVideoWidget
+
+        # Label que exibe os frames do buffer do FrameGrabber durante a navegação quadro a quadro.
+        # O QStackedWidget alterna entre o vídeo do VLC e este label
+        self.step_label = QLabel()
+        self.step_label.setAlignment(Qt.AlignCenter)
+        self.step_label.setStyleSheet("background-color: black;")
+        self.video_stack = QStackedWidget()
+        self.video_stack.addWidget(self.video_widget)
+        self.video_stack.addWidget(self.step_label)
+
         # Associa o widget ao layout central
         # stretch = 1 aumenta o vídeo para ocupar o espaço do vídeo
-        self.main_layout.addWidget(self.video_widget, stretch=1)
+        self.main_layout.addWidget(self.video_stack, stretch=1)
 
         # Criando um widget dedicado para os controles, com uma altura fixa
         self.controls_widget = QWidget()  # Cria uma instância do QWidget
@@ -102,42 +136,35 @@ class VideoPlayer(QMainWindow):
         # associar o VLC à janela criada.
 
         if getattr(sys, 'frozen', False):
-            BASE_DIR = sys._MEIPASS  # Diretório temporário do PyInstaller
+            self.base_dir = sys._MEIPASS  # Diretório temporário do PyInstaller
             sys.stdout = open(os.devnull, 'w')  # Oculta a saída no terminal
             sys.stderr = open(os.devnull, 'w')  # Oculta os erros
         else:
-            BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-
-        # Adiciona a pasta do VLC ao PATH
-        os.environ["PATH"] += os.pathsep + BASE_DIR
-
-        # Define manualmente o caminho dos plugins do VLC
-        vlc_plugin_path = os.path.join(BASE_DIR, "plugins")
-        os.environ["VLC_PLUGIN_PATH"] = vlc_plugin_path
-
-        # Caminhos das DLLs
-        libvlc_path = os.path.join(BASE_DIR, "libvlc.dll")
-        libvlccore_path = os.path.join(BASE_DIR, "libvlccore.dll")
-
-        # Carrega as DLLs do VLC manualmente
-        ctypes.CDLL(libvlccore_path)
-        ctypes.CDLL(libvlc_path)
-
-        # Agora podemos importar o módulo vlc
-        import vlc
-
-        # Testa se o VLC foi carregado corretamente
-        print("Versão do VLC:", vlc.libvlc_get_version())
-
-        self.instance = vlc.Instance(f"--plugin-path={BASE_DIR}")  # cria uma instância do framework do VLC
-        self.media_player = self.instance.media_player_new()  # cria um novo player de vídeo a partir da instância
-        self.media_player.set_hwnd(int(self.video_widget.winId()))  # Vincula o player do VLC à janela criada
+            self.base_dir = os.path.dirname(os.path.abspath(__file__))
+
+        # O carregamento das DLLs do VLC, a criação da instância do VLC e a importação do OpenCV
+        # são feitos em uma thread separada (warm_up), de forma que a janela seja exibida
+        # imediatamente. Ao final, o sinal warm_up_finished associa o player à janela (attach_player)
+        self.instance = None
+        self.media_player = None
+        self.frame_grabber = None
+        self.warm_up_error = None  # Erro ocorrido durante a inicialização em segundo plano (ex: DLL ausente)
+        self.warm_up_thread = threading.Thread(target=self.warm_up, daemon=True)
+        self.warm_up_finished.connect(self.attach_player)
+        self.warm_up_thread.start()
+
+        # Thread de salvamento dos recortes: a gravação dos PNGs e a atualização dos índices
+        # ocorrem em segundo plano, e o resultado é informado na barra de status
+        self.crop_writer = CropWriter()
+        self.crop_writer.saved.connect(self.crop_saved)
+        self.crop_writer.failed.connect(self.crop_failed)
 
         # -------------------------------------------------------------------------------------------------------------
 
         # Definição elementos de controle (botões e slider)
 
-        self.slider = QSlider(Qt.Horizontal)  # slider
+        self.slider = PreviewSlider(Qt.Horizontal)  # slider com pré-visualização das miniaturas do vídeo
+        self.slider.setMaximum(1000)  # Resolução da barra (1000 posições ao longo do vídeo)
         self.open_button = QPushButton("Abrir Vídeo")  # botão para abrir vídeo
         self.next_frame_btn = QPushButton("Avançar frame")  # botão para Avançar frame
         self.prev_frame_btn = QPushButton("Retroceder frame")  # botão para Retroceder frame
@@ -164,6 +191,19 @@ class VideoPlayer(QMainWindow):
 
         self.capture_frame_btn = QPushButton("Capturar frame")
 
+        # Reprodução de uma cópia leve do vídeo (proxy), para vídeos pesados (ex: 4K de celular)
+        self.proxy_checkbox = QCheckBox("Reproduzir versão leve (proxy)")
+
+        # Modo de captura em rajada: as teclas das classes salvam o recorte na última seleção
+        # feita na janela de captura, sem abrir a janela, e avançam N frames
+        self.burst_checkbox = QCheckBox("Captura em rajada (teclas 1 a 4)")
+        self.burst_step = QSpinBox()  # Quantidade de frames avançados após cada captura
+        self.burst_step.setRange(1, 300)
+        self.burst_step.setValue(5)
+        self.burst_step.setPrefix("Avançar ")
+        self.burst_step.setSuffix(" frame(s)")
+        self.burst_label = QLabel("Nenhuma seleção para a rajada")
+
         # -------------------------------------------------------------------------------------------------------------
 
         # Inserindo os elementos criados na janela de controles
@@ -180,11 +220,27 @@ class VideoPlayer(QMainWindow):
         self.control_layout.addWidget(self.time_label)  # Inserção do label como elemento da janela de controles
         self.control_layout.addWidget(self.slider)
 
+        # Marcas dos frames sugeridos pela análise de movimento e botões de navegação entre eles
+        self.candidate_bar = CandidateBar()
+        self.control_layout.addWidget(self.candidate_bar)
+        self.candidate_layout = QHBoxLayout()
+        self.prev_candidate_btn = QPushButton("< Sugestão")
+        self.next_candidate_btn = QPushButton("Sugestão >")
+        self.candidate_label = QLabel("Sugestões: -")
+        self.candidate_layout.addWidget(self.prev_candidate_btn)
+        self.candidate_layout.addWidget(self.candidate_label)
+        self.candidate_layout.addWidget(self.next_candidate_btn)
+        self.control_layout.addLayout(self.candidate_layout)
+
         self.speed_label = QLabel("Velocidade: 1x")  # Exibe a velocidade atual
         self.control_layout.addWidget(self.speed_label)
         self.control_layout.addWidget(self.speed_slider)
+        self.control_layout.addWidget(self.proxy_checkbox)
 
         self.control_layout.addWidget(self.capture_frame_btn)
+        self.control_layout.addWidget(self.burst_checkbox)
+        self.control_layout.addWidget(self.burst_step)
+        self.control_layout.addWidget(self.burst_label)
 
         self.control_layout.addWidget(self.open_button)
 
@@ -253,12 +309,27 @@ class VideoPlayer(QMainWindow):
 
         self.save_menu.clicked.connect(self.open_save_menu)
 
+        self.candidate_bar.jump.connect(self.jump_to_time)
+        self.prev_candidate_btn.clicked.connect(lambda: self.jump_candidate(-1))
+        self.next_candidate_btn.clicked.connect(lambda: self.jump_candidate(1))
+        self.candidates_ready.connect(self.show_candidates)
+        self.sprite_ready.connect(self.show_sprite)
+        self.proxy_checkbox.toggled.connect(self.toggle_proxy)
+        self.proxy_ready.connect(self.proxy_finished)
+
+        # FPS do proxy em reprodução (None quando o VLC reproduz o vídeo original)
+        self.proxy_fps = None
+        self.proxy_building = set()  # Vídeos com proxy em geração
+        self.candidates = []  # Tempos (ms) dos frames sugeridos para o vídeo atual
+
         # -------------------------------------------------------------------------------------------------------------
 
-        # Timer responsável por atualizar a barra de progresso
-        self.timer = QTimer(self)  # Cria uma instância do temporizador
-        self.timer.setInterval(500)  # Define um intervalo de tempo de 500ms
-        self.timer.timeout.connect(self.update_slider)  # O slider é atualizado a cada 500ms, utilizando a fução update
+        # A barra de progresso é atualizada pelos eventos do VLC (tempo e duração), e não por um
+        # temporizador. Os eventos chegam em uma thread do VLC e são repassados à interface pelos
+        # sinais abaixo, conectados uma única vez
+        self.duration = 0  # Duração do vídeo atual (ms), informada pelo evento de duração
+        self.time_changed.connect(self.update_slider)
+        self.length_changed.connect(self.set_duration)
 
         # -------------------------------------------------------------------------------------------------------------
 
@@ -279,6 +350,24 @@ class VideoPlayer(QMainWindow):
         self.exit_shortcut = QShortcut(QKeySequence(self.keys[4]), self)
         self.exit_shortcut.activated.connect(self.exit_program)
 
+        # Teclas das classes no modo de captura em rajada (ativas apenas com o modo habilitado)
+        self.burst_classes = ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+        self.burst_shortcuts = []
+        for key, folder_name in enumerate(self.burst_classes, start=1):
+            shortcut = QShortcut(QKeySequence(str(key)), self)
+            shortcut.activated.connect(lambda folder_name=folder_name: self.burst_capture(folder_name))
+            shortcut.setEnabled(False)
+            self.burst_shortcuts.append(shortcut)
+        self.burst_checkbox.toggled.connect(self.toggle_burst_mode)
+
+        # Seleção reutilizada pela rajada (em pixels do vídeo original) e se o frame deve ser invertido
+        self.last_roi = None
+        self.last_flipped = False
+
+        # Horário de cada captura em rajada, para o cálculo de capturas por minuto
+        self.burst_times = deque()
+        self.burst_count = 0
+
         # Variável de nome do arquivo de vídeo
         # e do caminho da imagem carregada
 
@@ -286,9 +375,9 @@ class VideoPlayer(QMainWindow):
         self.file_name = None
         self.extension = None
 
-        # self.event_manager = self.media_player.event_manager()
-        # self.event_manager.event_attach(vlc.EventType.MediaPlayerEndReached, self.reload_video)
-        self.timer.timeout.connect(self.check_time_before_end)
+        # Frame exibido durante a navegação quadro a quadro: (índice, tempo em ms, frame)
+        # None indica que o vídeo está sendo exibido normalmente pelo VLC
+        self.step_entry = None
 
     # -------------------------------------------------------------------------------------------------------------
     # -------------------------------------------------------------------------------------------------------------
@@ -296,8 +385,106 @@ class VideoPlayer(QMainWindow):
     # -------------------------------------------------------------------------------------------------------------
     # -------------------------------------------------------------------------------------------------------------
 
+    def warm_up(self):
+
+        # Executada em uma thread separada durante a abertura do programa. Um erro (ex: DLL do VLC
+        # ausente) não pode simplesmente encerrar a thread: ele é guardado e informado ao usuário
+        # por attach_player/ensure_player, já que no executável a saída de erros é descartada
+        try:
+            self.load_libraries()
+        except Exception as error:
+            import traceback
+            traceback.print_exc()
+            self.warm_up_error = error
+
+        self.warm_up_finished.emit()
+
+    def load_libraries(self):
+
+        # Carrega o VLC e o OpenCV (executada por warm_up, em segundo plano)
+        BASE_DIR = self.base_dir
+
+        # Adiciona a pasta do VLC ao PATH
+        os.environ["PATH"] += os.pathsep + BASE_DIR
+
+        # Define manualmente o caminho dos plugins do VLC
+        vlc_plugin_path = os.path.join(BASE_DIR, "plugins")
+        os.environ["VLC_PLUGIN_PATH"] = vlc_plugin_path
+
+        # Caminhos das DLLs
+        libvlc_path = os.path.join(BASE_DIR, "libvlc.dll")
+        libvlccore_path = os.path.join(BASE_DIR, "libvlccore.dll")
+
+        # Carrega as DLLs do VLC manualmente
+        ctypes.CDLL(libvlccore_path)
+        ctypes.CDLL(libvlc_path)
+
+        # Agora podemos importar o módulo vlc
+        import vlc
+
+        # Testa se o VLC foi carregado corretamente
+        print("Versão do VLC:", vlc.libvlc_get_version())
+
+        self.instance = vlc.Instance(f"--plugin-path={BASE_DIR}")  # cria uma instância do framework do VLC
+        startup_timer.mark("VLC carregado")
+
+        # Importa previamente o OpenCV (utilizado pelo FrameGrabber e pela janela de captura)
+        from FrameGrabber import FrameGrabber
+        startup_timer.mark("OpenCV carregado")
+
+        # Decodificador responsável por fornecer o frame atual diretamente em memória
+        self.frame_grabber = FrameGrabber()
+
+    def attach_player(self):
+
+        # Executada na thread da interface ao final de warm_up: cria o player
+        # e o vincula à janela de vídeo (winId deve ser obtido na thread da interface)
+        if self.media_player is not None:
+            return
+
+        if self.warm_up_error is not None or self.instance is None or self.frame_grabber is None:
+            self.report_warm_up_error()
+            return
+
+        self.media_player = self.instance.media_player_new()  # cria um novo player de vídeo a partir da instância
+        self.media_player.set_hwnd(int(self.video_widget.winId()))  # Vincula o player do VLC à janela criada
+
+        # Eventos do player (válidos para todas as mídias carregadas nele). As funções de retorno
+        # não podem chamar o VLC, por isso apenas emitem os sinais tratados na thread da interface
+        import vlc
+
+        self.vlc_events = self.media_player.event_manager()
+        self.vlc_events.event_attach(vlc.EventType.MediaPlayerTimeChanged,
+                                     lambda event: self.time_changed.emit(event.u.new_time))
+        self.vlc_events.event_attach(vlc.EventType.MediaPlayerLengthChanged,
+                                     lambda event: self.length_changed.emit(event.u.new_length))
+        startup_timer.mark("Player associado à janela")
+
+        if self.report_timing:
+            startup_timer.report()
+
+    def ensure_player(self):
+
+        # Garante que a inicialização em segundo plano terminou antes de utilizar o player.
+        # Caso o usuário acione algum controle durante a inicialização, aguarda a sua conclusão
+        if self.media_player is None:
+            self.warm_up_thread.join()
+            self.attach_player()
+
+        return self.media_player is not None
+
+    def report_warm_up_error(self):
+
+        # Informa que o VLC (ou o OpenCV) não pôde ser carregado: sem o player, os controles não funcionam
+        error = self.warm_up_error or "inicialização incompleta"
+        QMessageBox.critical(self, 'Erro', f'Não foi possível carregar o VLC/OpenCV: {error}\n'
+                                           f'Os controles de vídeo permanecerão desativados.')
+
     def open_file(self):
 
+        if not self.ensure_player():
+            return 0
+
         model = Model()
         self.file_name = model.open_video(parent=self)
         valid_extensions = ['.mp4', '.mov', '.MOV', '.MP4']
@@ -320,34 +507,244 @@ class VideoPlayer(QMainWindow):
 
     def start_video(self, file_name):
 
-        media = self.instance.media_new(file_name)  # Cria um objeto de mídia a parir da instância do  VLC
+        # Abre o decodificador de frames apenas quando o arquivo muda (evita reabrir a cada loop).
+        # O decodificador sempre utiliza o vídeo original, mesmo quando o VLC reproduz o proxy
+        new_file = self.frame_grabber.file_name != file_name
+        if new_file:
+            self.frame_grabber.open(file_name)
+
+        # Com a opção de proxy marcada, o VLC reproduz a cópia leve (quando já gerada)
+        proxy_path = None
+        if self.proxy_checkbox.isChecked():
+            from core.ProxyGenerator import ProxyGenerator
+
+            generator = ProxyGenerator(file_name)
+            if generator.exists():
+                proxy_path = generator.proxy_path()
+            elif new_file:
+                self.request_proxy(file_name)
+
+        self.load_media(proxy_path or file_name, proxy_path is not None)
+
+        if new_file:
+            # A tabela de timestamps (numeração exata dos frames) é carregada ou
+            # construída em segundo plano, sem bloquear a reprodução
+            threading.Thread(target=self.load_frame_index, args=(file_name,), daemon=True).start()
+
+            # A análise de movimento (frames sugeridos) também é feita em segundo plano
+            self.candidates = []
+            self.candidate_bar.set_candidates([])
+            self.candidate_label.setText("Sugestões: analisando...")
+            threading.Thread(target=self.analyze_video, args=(file_name,), daemon=True).start()
+
+            # O sprite com as miniaturas da barra de rolagem é carregado (ou gerado) em segundo plano
+            self.slider.set_sprite(None)
+            threading.Thread(target=self.load_sprite, args=(file_name,), daemon=True).start()
+
+        self.update_slider()
+
+    def load_media(self, path, is_proxy, start_time=0, paused=False):
+
+        # Carrega o arquivo 'path' no VLC. start_time (ms, no tempo do arquivo) e paused
+        # permitem trocar entre o original e o proxy mantendo a posição atual
+        media = self.instance.media_new(path)  # Cria um objeto de mídia a parir da instância do  VLC
+
+        # O próprio VLC reinicia o vídeo ao chegar ao fim (reprodução em loop), sem recriar a mídia
+        media.add_option(":input-repeat=65535")
+        if start_time > 0:
+            media.add_option(f":start-time={start_time / 1000:.3f}")
+        if paused:
+            media.add_option(":start-paused")
+
         self.media_player.set_media(media)  # O objeto de mídia (media) é atribuído ao player de vídeo
         self.media_player.audio_set_mute(True)  # Tira o audio do vídeo
         self.media_player.play()  # O vlc inicia a reprodução do vídeo carregado
-        self.timer.start()  # Inicia o timer da barra de progresso
 
-        # Iniciar o timer de atualização do slider
-        self.update_slider()
-        self.timer.timeout.connect(self.update_slider)
-        self.timer.start(1000)  # Atualiza a cada segundo
+        self.proxy_fps = (self.frame_grabber.fps or 30) if is_proxy else None
 
-    def check_time_before_end(self):
-        """Verifica o tempo restante e chama uma função 1 segundo antes do vídeo encerrar."""
-        if self.media_player is not None:
-            duration = self.media_player.get_length()  # Duração total do vídeo
-            current_time = self.media_player.get_time()  # Tempo atual do vídeo
+    def player_time(self):
+
+        # Tempo atual (ms) no vídeo original. No proxy (mesmos frames, FPS constante), o tempo do
+        # VLC é convertido no índice do frame e, então, no timestamp do frame no vídeo original
+        current_time = self.media_player.get_time()
+        if self.proxy_fps is None:
+            return current_time
+
+        index = int((current_time + 0.5) * self.proxy_fps / 1000)
+        if self.frame_grabber.frame_index is not None:
+            return self.frame_grabber.frame_index.time_for_frame(index)
+        return index * 1000 / self.proxy_fps
+
+    def set_player_time(self, source_time):
+
+        # Posiciona o VLC no tempo (ms) do vídeo original, convertendo-o para o tempo do proxy
+        if self.proxy_fps is not None:
+            source_time = self.frame_grabber.index_for_time(source_time) * 1000 / self.proxy_fps
 
-            # Verifica se falta 1 segundo para o fim do vídeo
-            if duration - current_time <= 500:  # 1000 ms = 1 segundo
-                self.timer.stop()  # Para o timer
-                self.reload_video()  # Chama a função desejada
+        self.media_player.set_time(int(source_time))
 
-    def reload_video(self):
+    def toggle_proxy(self, enabled):
 
-        self.start_video(self.file_name)
+        # Alterna entre o vídeo original e o proxy, mantendo a posição e o estado de pausa
+        if self.frame_grabber is None or self.frame_grabber.file_name is None:
+            return
+
+        if enabled:
+            from core.ProxyGenerator import ProxyGenerator
+
+            generator = ProxyGenerator(self.frame_grabber.file_name)
+            if not generator.exists():
+                self.request_proxy(self.frame_grabber.file_name)
+                return
+            self.switch_media(generator.proxy_path())
+        elif self.proxy_fps is not None:
+            self.switch_media(None)
+
+    def request_proxy(self, file_name):
+
+        # Gera o proxy em segundo plano. A reprodução continua no vídeo original até o término
+        if file_name in self.proxy_building:
+            return
+
+        self.proxy_building.add(file_name)
+        self.statusBar().showMessage("Gerando a versão leve do vídeo...")
+        threading.Thread(target=self.build_proxy, args=(file_name,), daemon=True).start()
+
+    def build_proxy(self, file_name):
+
+        # Executada em uma thread separada
+        from core.ProxyGenerator import ProxyGenerator
+
+        try:
+            proxy_path = ProxyGenerator(file_name).build()
+        except Exception as error:
+            print(f"Erro ao gerar o proxy de {file_name}: {error}")
+            proxy_path = None
+
+        self.proxy_ready.emit(file_name, proxy_path or "")
+
+    def proxy_finished(self, file_name, proxy_path):
+
+        self.proxy_building.discard(file_name)
+
+        if not proxy_path:
+            # A reprodução continua no vídeo original; a opção é desmarcada (sem proxy carregado,
+            # toggle_proxy não recarrega a mídia)
+            self.statusBar().showMessage("Não foi possível gerar a versão leve do vídeo", 5000)
+            if file_name == self.frame_grabber.file_name and self.proxy_fps is None:
+                self.proxy_checkbox.setChecked(False)
+            return
+
+        self.statusBar().showMessage("Versão leve do vídeo pronta", 5000)
+
+        # Troca para o proxy caso a opção continue marcada e o vídeo não tenha sido trocado
+        if self.proxy_checkbox.isChecked() and file_name == self.frame_grabber.file_name and self.proxy_fps is None:
+            self.switch_media(proxy_path)
+
+    def switch_media(self, proxy_path):
+
+        # Recarrega o VLC com o proxy (ou com o original, quando proxy_path é None) na mesma posição
+        source_time = self.step_entry[1] if self.step_entry is not None else self.player_time()
+        paused = not self.media_player.is_playing()
+
+        if proxy_path is not None:
+            fps = self.frame_grabber.fps or 30
+            start_time = self.frame_grabber.index_for_time(source_time) * 1000 / fps
+        else:
+            start_time = source_time
+
+        self.load_media(proxy_path or self.frame_grabber.file_name, proxy_path is not None, start_time, paused)
+
+    def load_frame_index(self, file_name):
+
+        # Executada em uma thread separada: carrega (ou constrói) a tabela de timestamps do vídeo
+        from core.FrameIndex import FrameIndex
+
+        frame_index = FrameIndex(file_name).load_or_build()
+
+        # Descarta a tabela caso outro vídeo tenha sido aberto durante a construção, ou caso esteja
+        # vazia (o OpenCV não decodificou o vídeo): o numero do frame continua estimado pelo FPS
+        if self.frame_grabber.file_name == file_name and len(frame_index) > 0:
+            self.frame_grabber.set_frame_index(frame_index)
+
+    def analyze_video(self, file_name):
+
+        # Executada em uma thread separada: carrega (ou calcula) as medidas de movimento do vídeo
+        from core.MotionAnalysis import MotionAnalysis
+
+        try:
+            candidates = MotionAnalysis(file_name).load_or_build().candidates()
+        except Exception as error:
+            print(f"Erro na análise de movimento de {file_name}: {error}")
+            candidates = []
+
+        self.candidates_ready.emit(file_name, candidates)
+
+    def show_candidates(self, file_name, candidates):
+
+        # Exibe as marcas dos frames sugeridos (descartadas caso outro vídeo tenha sido aberto)
+        if file_name != self.frame_grabber.file_name:
+            return
+
+        self.candidates = candidates
+        self.candidate_bar.set_candidates(candidates)
+        self.candidate_label.setText(f"Sugestões: {len(candidates)}")
+
+    def load_sprite(self, file_name):
+
+        # Executada em uma thread separada: carrega (ou gera) o sprite de miniaturas do vídeo
+        from core.SpriteSheet import SpriteSheet
+
+        try:
+            sprite = SpriteSheet(file_name).load_or_build()
+        except Exception as error:
+            print(f"Erro ao gerar as miniaturas de {file_name}: {error}")
+            return
+
+        self.sprite_ready.emit(file_name, sprite)
+
+    def show_sprite(self, file_name, sprite):
+
+        # Ativa a pré-visualização da barra (descartada caso outro vídeo tenha sido aberto)
+        if file_name == self.frame_grabber.file_name:
+            self.slider.set_sprite(sprite)
+
+    def jump_candidate(self, direction):
+
+        # Vai até o próximo (direction = 1) ou anterior (direction = -1) frame sugerido
+        if not self.candidates or not self.ensure_player():
+            return
+
+        current_time = self.step_entry[1] if self.step_entry is not None else self.player_time()
+
+        # Tolerância de 50 ms, para que o candidato atual não seja escolhido novamente
+        if direction > 0:
+            position = bisect.bisect_right(self.candidates, current_time + 50)
+            if position < len(self.candidates):
+                self.jump_to_time(self.candidates[position])
+        else:
+            position = bisect.bisect_left(self.candidates, current_time - 50)
+            if position > 0:
+                self.jump_to_time(self.candidates[position - 1])
+
+    def jump_to_time(self, time_ms):
+
+        # Posiciona o vídeo no tempo informado. Com o vídeo pausado, o frame exato é
+        # exibido a partir do buffer do FrameGrabber (pronto para a captura)
+        if not self.ensure_player():
+            return
+
+        if self.media_player.is_playing():
+            self.leave_step_mode()
+            self.set_player_time(time_ms)
+        else:
+            self.step_to(self.frame_grabber.index_for_time(time_ms))
 
     def toggle_play_pause(self):
 
+        if not self.ensure_player():
+            return
+
         # Valida se o vídeo está reproduzindo
         # Em caso positivo, o vídeo é pausado. Em caso negativo o vídeo é reproduzido
 
@@ -355,49 +752,209 @@ class VideoPlayer(QMainWindow):
             self.media_player.pause()
 
         else:
+            self.leave_step_mode()
             self.media_player.play()
 
+    def current_frame_index(self):
+
+        # Índice do frame atual: o frame exibido na navegação quadro a quadro ou,
+        # caso contrário, o frame correspondente ao tempo atual do VLC
+        if self.step_entry is not None:
+            return self.step_entry[0]
+
+        return self.frame_grabber.index_for_time(self.player_time())
+
+    def step_to(self, index):
+
+        # Exibe o frame 'index' a partir do buffer do FrameGrabber (exato e sem depender dos
+        # keyframes do VLC) e sincroniza o tempo do VLC para a retomada da reprodução
+        entry = self.frame_grabber.get(index)
+        if entry is None:
+            return
+
+        self.step_entry = entry
+        self.show_step_frame(entry[2])
+        self.set_player_time(entry[1])
+        self.update_slider()
+
+    def show_step_frame(self, frame):
+
+        # Converte o frame (BGR) para QImage (RGB) e o exibe no label de navegação
+        rgb = frame[:, :, ::-1].copy()
+        height, width = rgb.shape[:2]
+        qimage = QImage(rgb.data, width, height, 3 * width, QImage.Format_RGB888)
+
+        pixmap = QPixmap.fromImage(qimage).scaled(self.video_stack.size(), Qt.KeepAspectRatio,
+                                                  Qt.SmoothTransformation)
+        self.step_label.setPixmap(pixmap)
+        self.video_stack.setCurrentWidget(self.step_label)
+
+    def leave_step_mode(self):
+
+        # Volta a exibir o vídeo do VLC
+        self.step_entry = None
+        self.video_stack.setCurrentWidget(self.video_widget)
+
     def next_frame(self):
 
+        if not self.ensure_player():
+            return
+
         # Pausa o vídeo, caso ele já não esteja pausado
         if self.media_player.is_playing():
             self.media_player.pause()
 
-        # Utiliza um comando do próprio vlc para avançar o frame
-        self.media_player.next_frame()
+        if self.frame_grabber.file_name is None:
+            return
+
+        # O próximo frame é obtido do buffer de frames decodificados
+        self.step_to(self.current_frame_index() + 1)
 
     def prev_frame(self):
 
+        if not self.ensure_player():
+            return
+
         # Pausa o vídeo, caso ele já não esteja pausado
         if self.media_player.is_playing():
             self.media_player.pause()
 
-        # OBS: o vlc não possui uma função pronta para retroceder, por isso, é necessário
-        # retroceder manualmente retrocedendo o tempo do vídeo referente à um frame
-        fps = self.media_player.get_fps()  # Obtém FPS do vídeo
-        if fps > 0:
-            frame_time = int(1000 / fps)  # Tempo de um frame em ms
-            current_time = self.media_player.get_time()  # Tempo atual em ms
-            new_time = max(0, current_time - frame_time)  # Garante que não vá abaixo de 0
-            self.media_player.set_time(new_time)  # Define o novo tempo
+        if self.frame_grabber.file_name is None:
+            return
+
+        # OBS: o vlc não possui uma função pronta para retroceder e o reposicionamento por tempo
+        # depende dos keyframes do vídeo. Por isso, o frame anterior é obtido do buffer circular
+        # de frames decodificados mantido pelo FrameGrabber
+        self.step_to(max(0, self.current_frame_index() - 1))
 
     def frame_capture(self):
 
+        if not self.ensure_player():
+            return
+
         # Pausa o vídeo, caso ele já não esteja pausado
         if self.media_player.is_playing():
             self.media_player.pause()
 
-        # O VLC não tem uma função pronta para retornar o numero do frame atual, contudo é possível obter este valor
-        # por meio do valor de tempo do frame atual e pela taxa de quadros do vídeo (FPS), com isso temos a equação:
-        # frame atual = tempo atual (ms)/1000 * taxa de quadros
+        # O VLC não tem uma função pronta para retornar o numero do frame atual. O numero é obtido pela
+        # tabela de timestamps do vídeo (FrameIndex), correta inclusive para vídeos com taxa de quadros
+        # variável. Enquanto a tabela não estiver pronta, é utilizada a estimativa tempo (ms)/1000 * FPS
 
-        current_time = self.media_player.get_time()  # tempo do frame atual
         fps = self.media_player.get_fps()  # taxa de quadros do vídeo
-        frame = self.get_frame()
 
-        capture = FrameCapture(self.video_name, current_time, fps, frame, self.extension)
+        # Durante a navegação quadro a quadro, o frame exibido (já decodificado no buffer)
+        # é entregue diretamente à janela de captura, junto com seu índice exato
+        if self.step_entry is not None:
+            frame_number, current_time, frame = self.step_entry
+            frame = frame.copy()
+        else:
+            current_time = self.player_time()  # tempo do frame atual (no vídeo original)
+            frame_number = self.frame_grabber.index_for_time(current_time) if fps > 0 else None
+            frame = self.get_frame()
+
+        from FrameCapture import FrameCapture
+
+        capture = FrameCapture(self.video_name, current_time, fps, frame, self.extension, frame_number,
+                               self.crop_writer)
         capture.exec_()
 
+        # A última seleção salva na janela passa a ser utilizada pela captura em rajada
+        if capture.last_roi is not None:
+            self.last_roi = capture.last_roi
+            self.last_flipped = capture.last_flipped
+            self.update_burst_label()
+
+    def toggle_burst_mode(self, enabled):
+
+        # Habilita (ou desabilita) as teclas das classes
+        for shortcut in self.burst_shortcuts:
+            shortcut.setEnabled(enabled)
+
+        if enabled and self.last_roi is None:
+            QMessageBox.information(self, 'Aviso', 'Salve um recorte pela janela de captura para definir '
+                                                   'a seleção utilizada na rajada')
+
+    def burst_capture(self, folder_name):
+
+        # Salva o recorte do frame atual na última seleção, envia-o para a fila de salvamento
+        # e avança N frames, sem abrir a janela de captura
+        if not self.ensure_player():
+            return
+
+        if self.last_roi is None or self.frame_grabber.file_name is None:
+            QMessageBox.information(self, 'Erro', 'Nenhuma seleção ou vídeo disponível para a rajada')
+            return
+
+        # Pausa o vídeo, caso ele já não esteja pausado
+        if self.media_player.is_playing():
+            self.media_player.pause()
+
+        if self.step_entry is not None:
+            entry = self.step_entry
+        else:
+            entry = self.frame_grabber.get(self.current_frame_index())
+
+        if entry is None:
+            QMessageBox.information(self, 'Erro', 'Não foi possível obter o frame atual')
+            return
+
+        frame_number, current_time, frame = entry
+
+        # A seleção está em pixels do vídeo original e é limitada ao tamanho do frame (o vídeo pode
+        # ter sido trocado). Com a imagem invertida na janela de captura, apenas o recorte é invertido,
+        # de forma que as coordenadas registradas continuam apontando para a região real do vídeo
+        height, width = frame.shape[:2]
+        x1, x2, y1, y2 = self.last_roi
+        x2, y2 = min(x2, width), min(y2, height)
+        crop = frame[y1:y2, x1:x2]
+        if self.last_flipped:
+            crop = crop[::-1]
+
+        if crop.size == 0:
+            QMessageBox.information(self, 'Erro', 'A seleção da rajada está fora do frame atual')
+            return
+
+        # O índice do recorte é o primeiro ainda não utilizado para este frame, considerando também
+        # os recortes da rajada que ainda aguardam na fila de salvamento
+        index = self.crop_writer.reserve_index(folder_name, self.video_name, frame_number)
+
+        self.crop_writer.submit(crop.copy(), folder_name, self.video_name, frame_number, index,
+                                (x1, x2, y1, y2), (width, height))
+
+        # Registro da taxa de capturas (janela móvel de um minuto)
+        now = time.monotonic()
+        self.burst_times.append(now)
+        while now - self.burst_times[0] > 60:
+            self.burst_times.popleft()
+        self.burst_count += 1
+        self.update_burst_label()
+
+        self.step_to(frame_number + self.burst_step.value())
+
+    def update_burst_label(self):
+
+        # Exibe a seleção atual da rajada e a quantidade de capturas no último minuto
+        x1, x2, y1, y2 = self.last_roi
+        self.burst_label.setText(f"Seleção: {x2 - x1}x{y2 - y1} px em ({x1}, {y1})\n"
+                                 f"Capturas: {self.burst_count} | {len(self.burst_times)}/min")
+
+    def crop_saved(self, frame_path, folder_name, duplicate):
+
+        # Informa o término do salvamento de um recorte (emitido pela thread CropWriter)
+        message = f"Recorte salvo em '{folder_name}': {os.path.basename(frame_path)}"
+        if duplicate:
+            message += " (recorte duplicado substituído)"
+
+        pending = self.crop_writer.pending()
+        if pending:
+            message += f" - {pending} pendente(s)"
+
+        self.statusBar().showMessage(message, 5000)
+
+    def crop_failed(self, error):
+
+        QMessageBox.information(self, 'Erro', f'Não foi possível salvar o recorte: {error}')
+
     def get_frame(self):
 
         width = self.media_player.video_get_width()
@@ -407,17 +964,10 @@ class VideoPlayer(QMainWindow):
             QMessageBox.information(self,'Erro','Nenhum vídeo carregado ou reprodução ainda não começou')
             return 0
 
-        # Define o caminho do snapshot temporário
-        snapshot_path = "temp_frame.png"
-
-        # Captura um snapshot do frame atual
-        self.media_player.video_take_snapshot(0, snapshot_path, width, height)
-        time.sleep(0.2)  # Pequeno delay para garantir que o snapshot foi salvo
-
-        if os.path.exists(snapshot_path):
-            frame = cv2.imread(snapshot_path)  # Carrega a imagem com OpenCV
-            os.remove(snapshot_path)  # Remove o arquivo temporário
+        # Obtém o frame atual diretamente do decodificador (sem arquivos temporários)
+        frame = self.frame_grabber.grab(self.player_time())
 
+        if frame is not None:
             return frame
         else:
             QMessageBox.information(self,'Erro', 'Erro ao capturar o frame')
@@ -425,6 +975,9 @@ class VideoPlayer(QMainWindow):
 
     def change_speed(self):
 
+        if not self.ensure_player():
+            return
+
         speed_values = [0.25, 0.5, 1.0, 2.0, 4.0]  # Lista de valores de reprodução
 
         index = self.speed_slider.value()  # Obtém o índice da velocidade
@@ -442,20 +995,32 @@ class VideoPlayer(QMainWindow):
             # No caso do sliderMoved, ele emite um único inteiro (o valor do slider), e a função
             # set_position(self, value) está esperando exatamente um argumento além de self.
 
-            duration = self.media_player.get_length()  # Obtém a duração total do vídeo
+            duration = self.duration  # Duração total do vídeo
             # Obtem a duração do vídeo de acordo com a posição do slider
             new_time = int((value / self.slider.maximum()) * duration)
             # Define o tempo de vídeo de acordo com o tempo obtido pela posição do slider
+            self.leave_step_mode()
             self.media_player.set_time(new_time)
 
-    def update_slider(self):
+    def set_duration(self, duration):
+
+        # Recebe a duração do vídeo (evento de duração do VLC)
+        self.duration = duration
+        self.candidate_bar.set_duration(duration)
+        self.slider.set_duration(duration)
+        self.update_slider()
 
+    def update_slider(self, current_time=None):
+
+        # Chamada pelo evento de tempo do VLC (com o tempo atual) ou diretamente pela interface
         if self.media_player is not None:
 
-            duration = self.media_player.get_length()  # Duração total do vídeo em ms
-            current_time = self.media_player.get_time()  # Tempo atual do vídeo em ms
+            duration = self.duration  # Duração total do vídeo em ms
+            if current_time is None:
+                current_time = self.media_player.get_time()  # Tempo atual do vídeo em ms
 
-            if duration > 0:  # Garante que a duração do vídeo é válida
+            # O slider não é movido enquanto estiver sendo arrastado pelo usuário
+            if duration > 0 and not self.slider.isSliderDown():  # Garante que a duração do vídeo é válida
 
                 # Define um novo valor para o slider, levando em consideração o tempo de vídeo e o limite do slider
                 slider_value = int((current_time / duration) * self.slider.maximum())
@@ -469,12 +1034,15 @@ class VideoPlayer(QMainWindow):
 
     def open_save_menu(self):
 
+        from SaveMenu import SaveMenu
+
         menu = SaveMenu(self.video_name)
         menu.exec_()
 
     def key_mapping(self):
 
         if not hasattr(self, "map_window") or self.map_window is None:
+            from KeyMapper import KeyMapper
             self.map_window = KeyMapper()  # Criar um atributo da classe principal
 
         self.map_window.setModal(True)  # Bloqueia a interação na principal
@@ -503,7 +1071,21 @@ class VideoPlayer(QMainWindow):
         )
 
     def exit_program(self):
+        if self.frame_grabber is not None:
+            self.frame_grabber.release()
+
+        # Aguarda a gravação dos recortes ainda na fila de salvamento
+        self.crop_writer.stop()
+
+        # Incorpora os diários de Augmentation aos arquivos JSON antes de encerrar
+        Model().Augmentation_compact()
+
         if self.media_player:
+            # Os eventos são desassociados antes de encerrar, evitando sinais para a janela já fechada
+            import vlc
+
+            self.vlc_events.event_detach(vlc.EventType.MediaPlayerTimeChanged)
+            self.vlc_events.event_detach(vlc.EventType.MediaPlayerLengthChanged)
             self.media_player.stop()
             self.media_player.release()
             del self.media_player  # Remove a instância corretamente
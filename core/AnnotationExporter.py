@@ -0,0 +1,276 @@
+import os
+import json
+import time
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from .AugmentationStore import AugmentationStore
+from .AugmentationMaterializer import AugmentationMaterializer, PREVIEW_WIDTH, PREVIEW_HEIGHT
+
+
+def annotate_video(video_path, queue_path, output_dir, extension="jpg", overwrite=False):
+
+    # Função executada em um processo separado para cada vídeo. Os registros do vídeo (fila em
+    # NDJSON) são agrupados por frame, e o vídeo é decodificado uma única vez, de forma sequencial:
+    # para cada frame com caixas, a imagem é gravada em images/ e as caixas em labels/ (YOLO).
+    # Os dados de cada imagem (COCO) são gravados em <fila>.coco, uma imagem por linha
+    start = time.perf_counter()
+    frames = {}
+
+    with open(queue_path, "r", encoding="utf-8") as file:
+        for line in file:
+            register = json.loads(line)
+            frames.setdefault(register["frame"], set()).add(
+                (register["rotulo"], tuple(register["coordenadas"]), register["nativo"]))
+
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        return video_path, None, 0, 0, 0.0, f"Erro ao abrir {video_path}"
+
+    width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    # Registros antigos possuem coordenadas em pixels da pré-visualização (FrameCapture)
+    preview_scale = min(PREVIEW_WIDTH / width, PREVIEW_HEIGHT / height) if width and height else 1.0
+
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    fragment_path = queue_path + ".coco"
+    last_frame = max(frames)
+    frame_number = 0
+    written = 0
+
+    with open(fragment_path, "w", encoding="utf-8") as fragment:
+
+        while frame_number <= last_frame and capture.grab():
+
+            boxes = frames.get(frame_number)
+            if not boxes:
+                frame_number += 1
+                continue
+
+            image_name = f"{stem}_{frame_number:06d}.{extension}"
+            image_path = os.path.join(output_dir, "images", image_name)
+
+            # A imagem só é decodificada (retrieve) quando ainda não foi extraída
+            if overwrite or not os.path.exists(image_path):
+                ok, frame = capture.retrieve()
+                if not ok or not cv2.imwrite(image_path, frame):
+                    frame_number += 1
+                    continue
+
+            annotations = []
+            lines = []
+
+            for label, (x1, x2, y1, y2), native in sorted(boxes):
+
+                if not native:
+                    x1, x2, y1, y2 = (round(value / preview_scale) for value in (x1, x2, y1, y2))
+
+                x1, x2 = sorted((min(max(x1, 0), width), min(max(x2, 0), width)))
+                y1, y2 = sorted((min(max(y1, 0), height), min(max(y2, 0), height)))
+                if x2 <= x1 or y2 <= y1:
+                    continue
+
+                annotations.append({"category_id": label + 1, "bbox": [x1, y1, x2 - x1, y2 - y1],
+                                    "area": (x2 - x1) * (y2 - y1), "iscrowd": 0})
+                lines.append(f"{label} {(x1 + x2) / 2 / width:.6f} {(y1 + y2) / 2 / height:.6f} "
+                             f"{(x2 - x1) / width:.6f} {(y2 - y1) / height:.6f}\n")
+
+            with open(os.path.join(output_dir, "labels", os.path.splitext(image_name)[0] + ".txt"), "w") as file:
+                file.writelines(lines)
+
+            fragment.write(json.dumps({"file_name": image_name, "width": width, "height": height,
+                                       "video": stem, "frame": frame_number, "anotacoes": annotations},
+                                      ensure_ascii=False) + "\n")
+            written += 1
+            frame_number += 1
+
+    capture.release()
+
+    # Frames além do fim do vídeo
+    missing = sum(1 for number in frames if number >= frame_number)
+
+    return video_path, fragment_path, written, missing, time.perf_counter() - start, None
+
+
+class AnnotationExporter:
+
+    # Classe responsável por converter os registros de Augmentation (nome do video, frame e
+    # coordenadas) em anotações para o treinamento de detectores, nos formatos COCO e YOLO:
+    #
+    #   Anotacoes/images/<video>_<frame>.jpg   - frames extraídos dos vídeos originais
+    #   Anotacoes/labels/<video>_<frame>.txt   - caixas no formato YOLO (classe cx cy largura altura)
+    #   Anotacoes/annotations.json             - COCO (images, annotations, categories)
+    #   Anotacoes/data.yaml                    - classes e pastas para o treinamento YOLO
+    #
+    # Os registros são lidos em fluxo (AugmentationStore.iter_records) e distribuídos em filas por
+    # vídeo; cada vídeo é então decodificado uma única vez, em um processo separado. O arquivo COCO
+    # é montado a partir dos fragmentos de cada vídeo, sem carregar todas as anotações em memória.
+    # Imagens já extraídas são reaproveitadas em execuções seguintes (exceto com overwrite)
+
+    def __init__(self, video_dir, output_dir="Anotacoes", classes=None, workers=None, extension="jpg",
+                 overwrite=False):
+
+        self.video_dir = video_dir
+        self.output_dir = output_dir
+        self.classes = classes or ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+        self.workers = workers
+        self.extension = extension
+        self.overwrite = overwrite
+        self.queue_dir = os.path.join(output_dir, ".filas")
+
+    def queue_records(self, videos):
+
+        # Distribui os registros de todas as classes em filas (NDJSON) por vídeo, um registro por
+        # vez. Retorna ({vídeo: caminho da fila}, quantidade de registros, vídeos não encontrados)
+        queues = {}
+        files = {}
+        missing = set()
+        count = 0
+
+        try:
+            for label, class_name in enumerate(self.classes):
+                for register in AugmentationStore(class_name).iter_records():
+
+                    video_name = register["nome do video"]
+                    if video_name not in videos:
+                        missing.add(video_name)
+                        continue
+
+                    if video_name not in files:
+                        queues[video_name] = os.path.join(self.queue_dir, f"{len(queues):04d}.ndjson")
+                        files[video_name] = open(queues[video_name], "w", encoding="utf-8")
+
+                    # Quando disponíveis, as coordenadas ajustadas pelo rastreamento (RoiTracker) são utilizadas
+                    coords = register.get("coordenadas_rastreadas", register["coordenadas"])
+                    files[video_name].write(json.dumps(
+                        {"rotulo": label, "frame": register["frame"],
+                         "coordenadas": [coords["x1"], coords["x2"], coords["y1"], coords["y2"]],
+                         "nativo": "dimensoes" in register}) + "\n")
+                    count += 1
+        finally:
+            for file in files.values():
+                file.close()
+
+        return queues, count, missing
+
+    def run(self):
+
+        start = time.perf_counter()
+        videos = AugmentationMaterializer(self.video_dir).find_videos()
+
+        # As caixas são sempre regravadas; as imagens extraídas anteriormente são mantidas
+        shutil.rmtree(os.path.join(self.output_dir, "labels"), ignore_errors=True)
+        shutil.rmtree(self.queue_dir, ignore_errors=True)
+        for folder in ("images", "labels", ".filas"):
+            os.makedirs(os.path.join(self.output_dir, folder), exist_ok=True)
+
+        queues, count, missing = self.queue_records(videos)
+        for video_name in sorted(missing):
+            print(f"Vídeo '{video_name}' não encontrado em {self.video_dir}")
+
+        fragments = {}
+        total_images = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+
+            futures = {pool.submit(annotate_video, videos[video_name], queue_path, self.output_dir,
+                                   self.extension, self.overwrite): video_name
+                       for video_name, queue_path in queues.items()}
+
+            for future in as_completed(futures):
+                video_path, fragment_path, written, beyond_end, elapsed, error = future.result()
+
+                if error:
+                    print(error)
+                    continue
+
+                fragments[futures[future]] = fragment_path
+                total_images += written
+                print(f"{os.path.basename(video_path)}: {written} imagens em {elapsed:.1f}s"
+                      + (f", {beyond_end} frames além do fim do vídeo" if beyond_end else ""))
+
+        # Ordem determinística das imagens no arquivo COCO, independente da ordem dos processos
+        total_annotations = self.write_coco([fragments[name] for name in sorted(fragments)])
+        self.write_yolo_config()
+        removed = self.remove_stale_images()
+
+        shutil.rmtree(self.queue_dir, ignore_errors=True)
+
+        print(f"{count} registros: {total_images} imagens e {total_annotations} caixas em {self.output_dir}"
+              f" ({removed} imagens obsoletas removidas) em {time.perf_counter() - start:.1f}s")
+
+        return total_images
+
+    def write_coco(self, fragments):
+
+        # Monta annotations.json a partir dos fragmentos, em fluxo: as imagens são gravadas
+        # diretamente no arquivo final e as anotações em um arquivo temporário, anexado ao final
+        coco_path = os.path.join(self.output_dir, "annotations.json")
+        tmp_path = coco_path + ".tmp"
+        annotations_path = os.path.join(self.queue_dir, "annotations.tmp")
+
+        categories = [{"id": label + 1, "name": class_name} for label, class_name in enumerate(self.classes)]
+        info = {"description": "Recortes de dor (registros de Augmentation)",
+                "date_created": time.strftime("%Y-%m-%d %H:%M:%S")}
+
+        image_id = 0
+        annotation_id = 0
+
+        with open(tmp_path, "w", encoding="utf-8") as coco, \
+                open(annotations_path, "w+", encoding="utf-8") as annotations:
+
+            coco.write(f'{{"info": {json.dumps(info, ensure_ascii=False)}, '
+                       f'"categories": {json.dumps(categories, ensure_ascii=False)}, "images": [')
+
+            for fragment_path in fragments:
+                with open(fragment_path, "r", encoding="utf-8") as fragment:
+                    for line in fragment:
+
+                        image = json.loads(line)
+                        image_id += 1
+                        boxes = image.pop("anotacoes")
+                        image["id"] = image_id
+                        coco.write(("," if image_id > 1 else "") + json.dumps(image, ensure_ascii=False))
+
+                        for box in boxes:
+                            annotation_id += 1
+                            box.update(id=annotation_id, image_id=image_id)
+                            annotations.write(("," if annotation_id > 1 else "") + json.dumps(box))
+
+            coco.write('], "annotations": [')
+            annotations.seek(0)
+            shutil.copyfileobj(annotations, coco)
+            coco.write("]}\n")
+
+        os.replace(tmp_path, coco_path)
+
+        return annotation_id
+
+    def write_yolo_config(self):
+
+        # data.yaml no formato esperado pelo treinamento YOLO (nomes entre aspas, pois possuem espaços)
+        names = "".join(f"  {label}: {json.dumps(class_name, ensure_ascii=False)}\n"
+                        for label, class_name in enumerate(self.classes))
+
+        with open(os.path.join(self.output_dir, "data.yaml"), "w", encoding="utf-8") as file:
+            file.write(f"path: {json.dumps(os.path.abspath(self.output_dir), ensure_ascii=False)}\n"
+                       f"train: images\nval: images\nnames:\n{names}")
+
+    def remove_stale_images(self):
+
+        # Remove as imagens extraídas anteriormente que não possuem mais caixas (registros excluídos)
+        # ou com outra extensão, para que não sejam tratadas como imagens sem objetos
+        labels_dir = os.path.join(self.output_dir, "labels")
+        images_dir = os.path.join(self.output_dir, "images")
+        removed = 0
+
+        for file_name in os.listdir(images_dir):
+            stem, extension = os.path.splitext(file_name)
+            if extension != f".{self.extension}" or not os.path.exists(os.path.join(labels_dir, stem + ".txt")):
+                os.remove(os.path.join(images_dir, file_name))
+                removed += 1
+
+        return removed
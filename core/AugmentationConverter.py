@@ -0,0 +1,105 @@
+import os
+
+import cv2
+
+from .AugmentationStore import AugmentationStore
+from .AugmentationMaterializer import PREVIEW_WIDTH, PREVIEW_HEIGHT
+
+
+def video_dimensions(video_path):
+
+    # Retorna (largura, altura) do frame decodificado pelo OpenCV. O primeiro frame é lido,
+    # em vez de usar CAP_PROP_FRAME_WIDTH/HEIGHT, para considerar a rotação dos metadados
+    capture = cv2.VideoCapture(video_path)
+    ok, frame = capture.read()
+    capture.release()
+
+    if not ok:
+        return None
+
+    height, width = frame.shape[:2]
+    return width, height
+
+
+class AugmentationConverter:
+
+    # Classe responsável por converter registros de Augmentation antigos, cujas coordenadas
+    # estão em pixels da imagem exibida em FrameCapture (896x504), para pixels do vídeo original
+
+    def __init__(self, video_dir, classes=None):
+
+        self.video_dir = video_dir
+        self.classes = classes or ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+        self.dimensions = {}  # {nome do vídeo: (largura, altura) ou None}
+
+    def dimensions_for(self, video_name):
+
+        # Obtém (e armazena) as dimensões do vídeo correspondente ao nome informado
+        if video_name not in self.dimensions:
+            self.dimensions[video_name] = None
+
+            for extension in ('.mp4', '.mov', '.MP4', '.MOV'):
+                video_path = os.path.join(self.video_dir, video_name + extension)
+                if os.path.exists(video_path):
+                    self.dimensions[video_name] = video_dimensions(video_path)
+                    break
+
+        return self.dimensions[video_name]
+
+    def convert_register(self, register):
+
+        # Converte um registro para pixels do vídeo original (retorna False caso não seja possível)
+        dimensions = self.dimensions_for(register["nome do video"])
+        if dimensions is None:
+            return False
+
+        width, height = dimensions
+        scale_factor = min(PREVIEW_WIDTH / width, PREVIEW_HEIGHT / height)
+
+        # A mesma conversão de FrameCapture.source_selection, mantendo o recorte quadrado
+        coords = register["coordenadas"]
+        x1 = int(round(coords["x1"] / scale_factor))
+        y1 = int(round(coords["y1"] / scale_factor))
+        side_length = int(round((coords["x2"] - coords["x1"]) / scale_factor))
+        side_length = min(side_length, width - x1, height - y1)
+
+        register["coordenadas"] = {"x1": x1, "x2": x1 + side_length, "y1": y1, "y2": y1 + side_length}
+        register["dimensoes"] = {"largura": width, "altura": height}
+        return True
+
+    def run(self):
+
+        # Converte os registros de cada classe, reescrevendo apenas as classes alteradas
+        for class_name in self.classes:
+
+            store = AugmentationStore(class_name)
+
+            # As dimensões dos vídeos (leitura do primeiro frame) são obtidas antes da alteração,
+            # de forma que o lock da classe seja mantido apenas durante a conversão e a gravação
+            for register in store.iter_records():
+                if "dimensoes" not in register:
+                    self.dimensions_for(register["nome do video"])
+
+            missing = set()
+
+            def convert(dados):
+
+                # Converte os registros atuais da classe, relidos com o lock (AugmentationStore.update),
+                # mantendo os registros acrescentados pelo programa durante a conversão
+                converted = 0
+                for register in dados:
+                    if "dimensoes" in register:
+                        continue
+                    if self.convert_register(register):
+                        converted += 1
+                    else:
+                        missing.add(register["nome do video"])
+
+                return converted
+
+            converted = store.update(convert)
+
+            print(f"{class_name}: {converted} registros convertidos")
+            for video_name in sorted(missing):
+                print(f"  Vídeo '{video_name}' não encontrado em {self.video_dir}, registros mantidos")
+
@@ -0,0 +1,174 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from .AugmentationStore import AugmentationStore
+
+
+# Dimensões da área de exibição da janela FrameCapture. As coordenadas dos
+# registros de Augmentation são definidas sobre o frame redimensionado para essa área
+PREVIEW_WIDTH = 896
+PREVIEW_HEIGHT = 504
+
+
+def preview_frame(frame):
+
+    # Redimensiona o frame da mesma forma que FrameCapture.display_frame,
+    # de modo que as coordenadas dos registros sejam válidas sobre ele
+    height, width = frame.shape[:2]
+    scale_factor = min(PREVIEW_WIDTH / width, PREVIEW_HEIGHT / height)
+    new_size = (int(width * scale_factor), int(height * scale_factor))
+
+    return cv2.resize(frame, new_size, interpolation=cv2.INTER_AREA)
+
+
+def materialize_video(video_path, frames, output_dir, overwrite=False):
+
+    # Função executada em um processo separado para cada vídeo. O vídeo é decodificado
+    # uma única vez, de forma sequencial, e todos os recortes de cada frame são gravados
+    # assim que o frame é alcançado (sem reposicionar o decodificador a cada registro).
+    # frames: {numero do frame: [(classe, x1, x2, y1, y2, nome do arquivo, nativo), ...]}
+    start = time.perf_counter()
+    capture = cv2.VideoCapture(video_path)
+
+    if not capture.isOpened():
+        return video_path, 0, 0, 0.0, f"Erro ao abrir {video_path}"
+
+    last_frame = max(frames)
+    frame_number = 0
+    decoded = 0
+    written = 0
+
+    while frame_number <= last_frame:
+
+        # grab() apenas avança o decodificador; a conversão do frame (retrieve)
+        # só é realizada para os frames que possuem recortes a serem gravados
+        if not capture.grab():
+            break
+
+        crops = frames.get(frame_number)
+
+        if crops:
+            ok, frame = capture.retrieve()
+
+            if ok:
+                resized = None
+                decoded += 1
+
+                for class_name, x1, x2, y1, y2, file_name, native in crops:
+                    out_path = os.path.join(output_dir, class_name, file_name)
+
+                    if not overwrite and os.path.exists(out_path):
+                        continue
+
+                    # Registros em pixels do vídeo são recortados na resolução nativa. Registros
+                    # antigos (em pixels da pré-visualização) são recortados do frame redimensionado
+                    if native:
+                        crop = frame[y1:y2, x1:x2]
+                    else:
+                        if resized is None:
+                            resized = preview_frame(frame)
+                        crop = resized[y1:y2, x1:x2]
+
+                    if crop.size > 0 and cv2.imwrite(out_path, crop):
+                        written += 1
+
+        frame_number += 1
+
+    capture.release()
+
+    return video_path, frame_number, written, time.perf_counter() - start, None
+
+
+class AugmentationMaterializer:
+
+    # Classe responsável por transformar os registros de Augmentation (coordenadas dos
+    # 10 frames vizinhos anteriores e posteriores de cada recorte) em imagens
+
+    def __init__(self, video_dir, output_dir="Augmentation_frames", classes=None, workers=None, overwrite=False):
+
+        self.video_dir = video_dir
+        self.output_dir = output_dir
+        self.classes = classes or ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+        self.workers = workers
+        self.overwrite = overwrite
+
+    def find_videos(self):
+
+        # Retorna um dicionário {nome do vídeo (sem extensão): caminho} para a pasta de vídeos
+        videos = {}
+
+        for file_name in os.listdir(self.video_dir):
+            name, extension = os.path.splitext(file_name)
+            if extension.lower() in ('.mp4', '.mov'):
+                videos[name] = os.path.join(self.video_dir, file_name)
+
+        return videos
+
+    def group_records(self):
+
+        # Agrupa os registros de todas as classes por vídeo e por frame:
+        # {video: {frame: [(classe, x1, x2, y1, y2, nome do arquivo, nativo), ...]}}
+        grouped = {}
+
+        for class_name in self.classes:
+            for register in AugmentationStore(class_name).load():
+
+                # Quando disponíveis, as coordenadas ajustadas pelo rastreamento (RoiTracker) são utilizadas
+                coords = register.get("coordenadas_rastreadas", register["coordenadas"])
+                base_name = os.path.splitext(os.path.basename(register["caminho"]))[0]
+                file_name = f"{base_name}_aug{register['frame']}.png"
+
+                frames = grouped.setdefault(register["nome do video"], {})
+                frames.setdefault(register["frame"], []).append(
+                    (class_name, coords["x1"], coords["x2"], coords["y1"], coords["y2"], file_name,
+                     "dimensoes" in register))
+
+        return grouped
+
+    def run(self):
+
+        # Distribui os vídeos entre um conjunto de processos e reporta a taxa de frames por segundo
+        for class_name in self.classes:
+            os.makedirs(os.path.join(self.output_dir, class_name), exist_ok=True)
+
+        videos = self.find_videos()
+        grouped = self.group_records()
+
+        start = time.perf_counter()
+        total_frames = 0
+        total_written = 0
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+
+            futures = []
+            for video_name, frames in grouped.items():
+
+                if video_name not in videos:
+                    print(f"Vídeo '{video_name}' não encontrado em {self.video_dir}")
+                    continue
+
+                futures.append(pool.submit(materialize_video, videos[video_name], frames,
+                                           self.output_dir, self.overwrite))
+
+            for future in as_completed(futures):
+                video_path, frames_read, written, elapsed, error = future.result()
+
+                if error:
+                    print(error)
+                    continue
+
+                total_frames += frames_read
+                total_written += written
+                fps = frames_read / elapsed if elapsed > 0 else 0
+                print(f"{os.path.basename(video_path)}: {frames_read} frames, "
+                      f"{written} recortes, {fps:.1f} frames/s")
+
+        elapsed = time.perf_counter() - start
+        fps = total_frames / elapsed if elapsed > 0 else 0
+        print(f"Total: {total_frames} frames, {total_written} recortes em {elapsed:.1f}s ({fps:.1f} frames/s)")
+
+        return total_written
+
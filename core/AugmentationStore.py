@@ -0,0 +1,189 @@
+import os
+import json
+import threading
+
+
+# Um lock por classe (caminho absoluto da pasta), compartilhado por todas as instâncias:
+# a thread de salvamento (CropWriter) e a interface (exclusões em SaveMenu) alteram os
+# mesmos arquivos, e uma sequência load -> rewrite não pode ser intercalada com outra escrita
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+class AugmentationStore:
+
+    # Classe responsável pelo armazenamento dos registros de Augmentation de uma classe.
+    # Os registros ficam divididos em dois arquivos dentro de Augmentation/<classe>/:
+    #   Augmentation_<classe>.json   - base compactada (lista JSON, formato consumido externamente)
+    #   Augmentation_<classe>.ndjson - diário (journal) apenas de inserção, um registro por linha
+    # Cada captura apenas acrescenta linhas ao diário (custo constante), enquanto a compactação
+    # incorpora o diário à base JSON, mantendo o formato original para os demais consumidores.
+
+    def __init__(self, class_name, root="Augmentation"):
+
+        self.class_name = class_name
+        self.folder = os.path.join(root, class_name)
+        self.json_path = os.path.join(self.folder, f"Augmentation_{class_name}.json")
+        self.journal_path = os.path.join(self.folder, f"Augmentation_{class_name}.ndjson")
+
+        with _locks_guard:
+            self.lock = _locks.setdefault(os.path.abspath(self.folder), threading.RLock())
+
+    def load_base(self):
+
+        # Carrega a base JSON compactada (lista vazia caso não exista ou esteja vazia)
+        if os.path.exists(self.json_path) and os.path.getsize(self.json_path) > 0:
+            with open(self.json_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+
+        return []
+
+    def iter_base(self, chunk_size=1 << 16):
+
+        # Percorre os registros da base JSON um de cada vez, sem carregar a lista inteira:
+        # o arquivo é lido em blocos e cada registro é decodificado com raw_decode assim que
+        # estiver completo no buffer
+        if not os.path.exists(self.json_path) or os.path.getsize(self.json_path) == 0:
+            return
+
+        decoder = json.JSONDecoder()
+
+        with open(self.json_path, "r", encoding="utf-8") as file:
+            buffer = ""
+            position = 0
+            started = False
+
+            while True:
+
+                # Ignora espaços e separadores entre os registros
+                while position < len(buffer) and buffer[position] in " \t\r\n,":
+                    position += 1
+
+                if position < len(buffer):
+                    if not started:
+                        if buffer[position] != "[":
+                            raise ValueError(f"{self.json_path} não contém uma lista JSON")
+                        started = True
+                        position += 1
+                        continue
+
+                    if buffer[position] == "]":
+                        return
+
+                    try:
+                        register, end = decoder.raw_decode(buffer, position)
+                    except ValueError:
+                        register = None  # Registro incompleto: lê o próximo bloco
+
+                    if register is not None:
+                        yield register
+                        position = end
+                        continue
+
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    if started:
+                        raise ValueError(f"{self.json_path} incompleto")
+                    return
+
+                buffer = buffer[position:] + chunk
+                position = 0
+
+    def iter_journal(self):
+
+        # Percorre os registros do diário. Linhas incompletas (por exemplo, em razão de
+        # uma interrupção durante a escrita) são ignoradas
+        if not os.path.exists(self.journal_path):
+            return
+
+        with open(self.journal_path, "r", encoding="utf-8") as file:
+            for line in file:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print(f"Linha inválida ignorada em {self.journal_path}")
+
+    def load_journal(self):
+
+        # Carrega os registros do diário
+        return list(self.iter_journal())
+
+    def load(self):
+
+        # Retorna todos os registros da classe (base + diário), na ordem de inserção
+        return self.load_base() + self.load_journal()
+
+    def iter_records(self):
+
+        # Equivalente a load(), mas em fluxo: o uso de memória não depende da quantidade de registros
+        yield from self.iter_base()
+        yield from self.iter_journal()
+
+    def append(self, records):
+
+        # Acrescenta novos registros ao diário, sem reescrever a base
+        lines = "".join(json.dumps(register, ensure_ascii=False) + "\n" for register in records)
+
+        with self.lock:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(self.journal_path, "a", encoding="utf-8") as file:
+                file.write(lines)
+
+    def rewrite(self, records):
+
+        # Substitui todos os registros da classe pela lista 'records'. A base é escrita em um
+        # arquivo temporário e renomeada (operação atômica), e o diário é descartado em seguida
+        with self.lock:
+            os.makedirs(self.folder, exist_ok=True)
+
+            tmp_path = self.json_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(records, file, indent=4, ensure_ascii=False)
+            os.replace(tmp_path, self.json_path)
+
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+
+    def update(self, function):
+
+        # Altera os registros da classe com function(registros), que modifica a lista recebida e
+        # retorna a quantidade de registros alterados. Os registros são relidos com o lock da classe
+        # imediatamente antes da alteração, e não a partir de uma cópia carregada antes de um
+        # processamento demorado: registros acrescentados nesse intervalo não são descartados
+        with self.lock:
+            records = self.load()
+            changed = function(records)
+
+            if changed:
+                self.rewrite(records)
+
+        return changed
+
+    def remove_where(self, predicate):
+
+        # Remove os registros para os quais predicate(registro) é verdadeiro. A leitura e a escrita
+        # são feitas com o lock da classe, de forma que registros acrescentados por outra thread
+        # entre load() e rewrite() não sejam descartados. Retorna a quantidade de registros removidos
+        with self.lock:
+            records = self.load()
+            kept = [register for register in records if not predicate(register)]
+
+            # Os arquivos só são reescritos quando algum registro foi de fato removido
+            if len(kept) != len(records):
+                self.rewrite(kept)
+
+        return len(records) - len(kept)
+
+    def compact(self):
+
+        # Incorpora o diário à base JSON (apenas quando há registros pendentes)
+        with self.lock:
+            if not os.path.exists(self.journal_path):
+                return False
+
+            self.rewrite(self.load())
+            return True
+
@@ -0,0 +1,66 @@
+class BKTree:
+
+    # Árvore BK (Burkhard-Keller) para consultas por distância de Hamming entre hashes
+    # perceptuais (inteiros de 64 bits). Cada nó guarda um hash, os itens com esse hash e
+    # os filhos indexados pela distância até o nó; a desigualdade triangular permite
+    # descartar a maior parte da árvore em cada consulta, sem comparar todos os hashes
+
+    def __init__(self):
+
+        self.root = None  # [hash, [itens], {distância: nó filho}]
+        self.size = 0
+
+    @staticmethod
+    def distance(a, b):
+
+        # Distância de Hamming: quantidade de bits diferentes entre os dois hashes
+        return bin(a ^ b).count("1")
+
+    def add(self, value, item):
+
+        # Insere o item com o hash 'value'
+        self.size += 1
+
+        if self.root is None:
+            self.root = [value, [item], {}]
+            return
+
+        node = self.root
+        while True:
+            distance = self.distance(value, node[0])
+
+            if distance == 0:
+                node[1].append(item)
+                return
+
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def query(self, value, max_distance):
+
+        # Retorna [(distância, item)] para todos os itens a até 'max_distance' bits de 'value'
+        found = []
+        if self.root is None:
+            return found
+
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            distance = self.distance(value, node[0])
+
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+
+            # Apenas os filhos com distância em [d - max, d + max] podem conter resultados
+            for child_distance, child in node[2].items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+
+        return found
+
+    def __len__(self):
+
+        return self.size
@@ -0,0 +1,322 @@
+import os
+import re
+import sqlite3
+import hashlib
+
+from .BKTree import BKTree
+from .AugmentationStore import AugmentationStore
+
+
+class Catalog:
+
+    # Classe responsável pelo catálogo (SQLite) dos recortes salvos: caminho, classe, vídeo,
+    # numero do frame, índice do recorte, coordenadas (pixels do vídeo original), dimensões do
+    # frame e hashes (MD5 dos pixels e dHash perceptual). Com ele, a verificação de duplicatas,
+    # a listagem dos recortes de um vídeo e a classe de um recorte passam a ser consultas
+    # indexadas, sem percorrer as pastas de classificação. Inclusões e exclusões são transacionais.
+    #
+    # O vídeo é obtido do nome do arquivo (frame_<numero>_<video>_<indice>.png) e comparado de forma
+    # exata, evitando que os recortes de 'cat1' sejam confundidos com os de 'cat10'.
+    # Alterações feitas fora do programa são incorporadas pela reconciliação (reconcile), executada
+    # ao abrir o catálogo, caso alguma pasta de classificação tenha mudado desde a última
+    # sincronização (ver is_stale), ou por 'python -m core reconciliar'. Um catálogo aberto não volta
+    # a verificar as pastas: Dataset.catalog mantém uma instância por Dataset, e as inclusões e
+    # exclusões feitas por ela atualizam o estado registrado das pastas (save_folder_state)
+
+    # Padrão dos nomes gerados por Dataset.frame_path_generator: frame_<numero>_<video>_<indice>.png
+    FILE_PATTERN = re.compile(r"^frame_([^_]+)_(.+)_(\d+)\.(png|jpg)$", re.IGNORECASE)
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS recortes (
+            caminho TEXT PRIMARY KEY,
+            classe TEXT NOT NULL,
+            video TEXT NOT NULL,
+            frame INTEGER,
+            indice INTEGER,
+            x1 INTEGER, x2 INTEGER, y1 INTEGER, y2 INTEGER,
+            largura INTEGER, altura INTEGER,
+            md5 TEXT,
+            dhash TEXT,
+            mtime_ns INTEGER,
+            tamanho INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS recortes_video ON recortes (video, classe, frame);
+        CREATE INDEX IF NOT EXISTS recortes_md5 ON recortes (video, md5);
+        CREATE TABLE IF NOT EXISTS pastas (
+            pasta TEXT PRIMARY KEY,
+            mtime_ns INTEGER
+        );
+    """
+
+    def __init__(self, db_path="catalog.sqlite3", folders=None, reconcile=True):
+
+        self.db_path = db_path
+        self.folders = folders or ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+
+        # timeout: a thread de salvamento e a interface podem acessar o catálogo ao mesmo tempo
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(self.SCHEMA)
+
+        # Sincroniza o catálogo caso as pastas tenham sido alteradas fora do programa
+        if reconcile and self.is_stale():
+            self.reconcile()
+
+    def close(self):
+
+        self.connection.close()
+
+    @staticmethod
+    def frame_hash(frame):
+
+        # Calcula o hash MD5 dos pixels de um frame (array NumPy)
+        return hashlib.md5(frame.tobytes()).hexdigest()
+
+    @staticmethod
+    def perceptual_thumbnail(frame):
+
+        # Reduz o frame para 9x8 pixels em tons de cinza (entrada do dHash)
+        import cv2
+
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(frame, (9, 8), interpolation=cv2.INTER_AREA)
+
+    @staticmethod
+    def perceptual_hashes(thumbnails):
+
+        # Calcula o dHash (64 bits, em hexadecimal) de uma lista de miniaturas 9x8: cada bit indica
+        # se um pixel é mais claro que o vizinho da direita. A comparação e o empacotamento dos
+        # bits são feitos de uma só vez para todas as miniaturas
+        import numpy as np
+
+        if not thumbnails:
+            return []
+
+        small = np.stack(thumbnails)
+        bits = small[:, :, 1:] > small[:, :, :-1]
+        packed = np.packbits(bits.reshape(len(thumbnails), 64), axis=1)
+
+        return [row.tobytes().hex() for row in packed]
+
+    @classmethod
+    def parse_name(cls, file_name):
+
+        # Retorna (numero do frame ou None, vídeo, índice) a partir do nome do recorte (ou None)
+        match = cls.FILE_PATTERN.match(os.path.basename(file_name))
+        if match is None:
+            return None
+
+        frame = int(match.group(1)) if match.group(1).isdigit() else None
+        return frame, match.group(2), int(match.group(3))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    #    ESTADO DAS PASTAS
+
+    def current_folder_state(self):
+
+        # Retorna o mtime atual de cada pasta de classificação existente
+        return {folder: os.stat(folder).st_mtime_ns for folder in self.folders if os.path.exists(folder)}
+
+    def is_stale(self):
+
+        # O catálogo está desatualizado quando alguma pasta foi criada, removida
+        # ou teve arquivos adicionados/removidos desde a última sincronização
+        saved = dict(self.connection.execute("SELECT pasta, mtime_ns FROM pastas"))
+        return self.current_folder_state() != saved
+
+    def save_folder_state(self, folders=None):
+
+        # Registra o mtime atual das pastas (todas ou apenas as informadas)
+        state = self.current_folder_state()
+
+        with self.connection:
+            if folders is None:
+                self.connection.execute("DELETE FROM pastas")
+                folders = list(state)
+
+            for folder in folders:
+                if folder in state:
+                    self.connection.execute("INSERT OR REPLACE INTO pastas VALUES (?, ?)", (folder, state[folder]))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    #    INCLUSÃO, EXCLUSÃO E CONSULTAS
+
+    def add(self, path, frame, video_name, frame_number, index, coords=None, dimensions=None):
+
+        # Registra um recorte que acabou de ser salvo. coords = (x1, x2, y1, y2) e
+        # dimensions = (largura, altura), ambos em pixels do vídeo original
+        stat = os.stat(path)
+        x1, x2, y1, y2 = coords or (None, None, None, None)
+        width, height = dimensions or (None, None)
+        perceptual_hash = self.perceptual_hashes([self.perceptual_thumbnail(frame)])[0]
+
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO recortes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, os.path.dirname(path), video_name, frame_number, index, x1, x2, y1, y2, width, height,
+                 self.frame_hash(frame), perceptual_hash, stat.st_mtime_ns, stat.st_size))
+
+        self.save_folder_state([os.path.dirname(path)])
+
+    def remove(self, paths):
+
+        # Remove do catálogo os recortes informados (um caminho ou uma lista de caminhos),
+        # em uma única transação. Retorna {caminho: classe} dos recortes que estavam catalogados
+        if isinstance(paths, str):
+            paths = [paths]
+
+        removed = self.classes_of(paths)
+
+        with self.connection:
+            self.connection.executemany("DELETE FROM recortes WHERE caminho = ?", [(path,) for path in paths])
+
+        self.save_folder_state({os.path.dirname(path) for path in paths})
+
+        return removed
+
+    def classes_of(self, paths):
+
+        # Retorna {caminho: classe} dos recortes catalogados entre os caminhos informados
+        found = {}
+        for path in paths:
+            row = self.connection.execute("SELECT classe FROM recortes WHERE caminho = ?", (path,)).fetchone()
+            if row is not None:
+                found[path] = row[0]
+
+        return found
+
+    def find_by_hash(self, frame_hash, video_name):
+
+        # Retorna o caminho do recorte do vídeo com o mesmo hash (MD5 dos pixels), ou None
+        row = self.connection.execute("SELECT caminho FROM recortes WHERE video = ? AND md5 = ?",
+                                      (video_name, frame_hash)).fetchone()
+        if row is None:
+            return None
+
+        # Entradas que apontam para arquivos inexistentes são descartadas
+        if not os.path.exists(row[0]):
+            self.remove(row[0])
+            return None
+
+        return row[0]
+
+    def crops(self, video_name, class_name=None):
+
+        # Retorna os caminhos dos recortes do vídeo (de uma classe ou de todas), ordenados pelo frame
+        query = "SELECT caminho FROM recortes WHERE video = ?"
+        params = [video_name]
+
+        if class_name is not None:
+            query += " AND classe = ?"
+            params.append(class_name)
+
+        query += " ORDER BY frame, indice"
+        return [row[0] for row in self.connection.execute(query, params)]
+
+    def count(self):
+
+        # Retorna {classe: quantidade de recortes}
+        return dict(self.connection.execute("SELECT classe, COUNT(*) FROM recortes GROUP BY classe"))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    #    QUASE-DUPLICATAS
+
+    def build_tree(self):
+
+        # Constrói a BKTree com os hashes perceptuais de todos os recortes
+        tree = BKTree()
+        for path, perceptual_hash in self.connection.execute("SELECT caminho, dhash FROM recortes"):
+            if perceptual_hash:
+                tree.add(int(perceptual_hash, 16), path)
+
+        return tree
+
+    def near_duplicates(self, max_distance=6):
+
+        # Retorna todos os pares de quase-duplicatas [(distância, caminho a, caminho b)],
+        # ordenados pela distância. Cada par é informado uma única vez
+        tree = self.build_tree()
+        pairs = []
+
+        for path, perceptual_hash in self.connection.execute("SELECT caminho, dhash FROM recortes"):
+            if not perceptual_hash:
+                continue
+            for distance, other in tree.query(int(perceptual_hash, 16), max_distance):
+                if path < other:
+                    pairs.append((distance, path, other))
+
+        return sorted(pairs)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    #    RECONCILIAÇÃO COM O DISCO
+
+    def reconcile(self):
+
+        # Sincroniza o catálogo com os arquivos presentes nas pastas de classificação: arquivos
+        # novos ou alterados (mtime/tamanho) são catalogados, e entradas de arquivos inexistentes
+        # são removidas. As coordenadas de recortes não catalogados são obtidas dos registros de
+        # Augmentation. Retorna (incluídos, atualizados, removidos)
+        import cv2
+
+        print("Sincronizando o catálogo de recortes com as pastas")
+
+        known = {row[0]: (row[1], row[2]) for row in
+                 self.connection.execute("SELECT caminho, mtime_ns, tamanho FROM recortes")}
+        on_disk = set()
+        pending = []  # [(caminho, classe, vídeo, frame, índice, stat, imagem)]
+
+        for folder in self.folders:
+
+            if not os.path.exists(folder):
+                continue
+
+            for img_file in os.listdir(folder):
+
+                parsed = self.parse_name(img_file)
+                if parsed is None:
+                    continue
+
+                img_path = os.path.join(folder, img_file)
+                stat = os.stat(img_path)
+                on_disk.add(img_path)
+
+                if known.get(img_path) == (stat.st_mtime_ns, stat.st_size):
+                    continue
+
+                saved_image = cv2.imread(img_path)
+                if saved_image is None:
+                    print(f"Erro ao carregar {img_path}")
+                    continue
+
+                pending.append((img_path, folder, parsed, stat, self.frame_hash(saved_image),
+                                self.perceptual_thumbnail(saved_image)))
+
+        # Coordenadas e dimensões dos recortes, a partir dos registros de Augmentation
+        regions = {}
+        if pending:
+            for folder in self.folders:
+                for register in AugmentationStore(folder).load():
+                    if register.get("caminho") not in regions and "dimensoes" in register:
+                        coords, dims = register["coordenadas"], register["dimensoes"]
+                        regions[register["caminho"]] = (coords["x1"], coords["x2"], coords["y1"], coords["y2"],
+                                                        dims["largura"], dims["altura"])
+
+        perceptual = self.perceptual_hashes([item[5] for item in pending])
+        removed = [path for path in known if path not in on_disk]
+
+        with self.connection:
+            for (img_path, folder, parsed, stat, md5, _), perceptual_hash in zip(pending, perceptual):
+                frame, video_name, index = parsed
+                region = regions.get(img_path, (None,) * 6)
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO recortes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (img_path, folder, video_name, frame, index) + tuple(region) +
+                    (md5, perceptual_hash, stat.st_mtime_ns, stat.st_size))
+
+            self.connection.executemany("DELETE FROM recortes WHERE caminho = ?", [(path,) for path in removed])
+
+        self.save_folder_state()
+
+        added = sum(1 for item in pending if item[0] not in known)
+        return added, len(pending) - added, len(removed)
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from .Catalog import Catalog
+from .AugmentationMaterializer import AugmentationMaterializer
+
+
+def pad_to_square(crop):
+
+    # Completa o recorte com bordas pretas, centralizando-o, até que fique quadrado. Recortes da
+    # rajada ou próximos à borda do vídeo são limitados ao frame e podem ser retangulares; o
+    # preenchimento evita que sejam esticados (distorcidos) no redimensionamento
+    height, width = crop.shape[:2]
+    if height == width:
+        return crop
+
+    side = max(height, width)
+    top = (side - height) // 2
+    left = (side - width) // 2
+
+    return cv2.copyMakeBorder(crop, top, side - height - top, left, side - width - left,
+                              cv2.BORDER_CONSTANT, value=0)
+
+
+def resize_crop(crop, size):
+
+    # Redimensiona o recorte para size x size (preenchendo-o até ficar quadrado, sem distorção),
+    # utilizando INTER_AREA na redução e INTER_CUBIC na ampliação
+    crop = pad_to_square(crop)
+    interpolation = cv2.INTER_AREA if crop.shape[0] > size else cv2.INTER_CUBIC
+    return cv2.resize(crop, (size, size), interpolation=interpolation)
+
+
+def export_batch(items, output_dir, size):
+
+    # Função executada em um processo separado para um lote de recortes salvos.
+    # items: [(caminho de origem, caminho relativo de destino)]. Retorna (gravados, erros)
+    written = []
+    errors = []
+
+    for source, target in items:
+        crop = cv2.imread(source)
+        if crop is None:
+            errors.append(source)
+            continue
+
+        out_path = os.path.join(output_dir, target)
+        if cv2.imwrite(out_path, resize_crop(crop, size)):
+            written.append(target)
+        else:
+            errors.append(source)
+
+    return written, errors
+
+
+def export_video(video_path, frames, output_dir, size):
+
+    # Função executada em um processo separado para cada vídeo: o vídeo é decodificado uma única
+    # vez, de forma sequencial, e os recortes são refeitos a partir do frame original.
+    # frames: {numero do frame: [(caminho de origem, destino, (x1, x2, y1, y2))]}
+    capture = cv2.VideoCapture(video_path)
+    written = []
+    errors = []
+
+    if not capture.isOpened():
+        return written, [source for crops in frames.values() for source, _, _ in crops]
+
+    last_frame = max(frames)
+    frame_number = 0
+
+    while frame_number <= last_frame and capture.grab():
+
+        crops = frames.get(frame_number)
+        if crops:
+            ok, frame = capture.retrieve()
+
+            for source, target, (x1, x2, y1, y2) in crops:
+                crop = frame[y1:y2, x1:x2] if ok else None
+
+                if crop is not None and crop.size > 0 and \
+                        cv2.imwrite(os.path.join(output_dir, target), resize_crop(crop, size)):
+                    written.append(target)
+                else:
+                    errors.append(source)
+
+        frame_number += 1
+
+    capture.release()
+
+    # Frames além do fim do vídeo
+    errors.extend(source for number, crops in frames.items() if number >= frame_number for source, _, _ in crops)
+
+    return written, errors
+
+
+class CropExporter:
+
+    # Classe responsável por exportar os recortes do catálogo em um tamanho fixo (ex: 224x224),
+    # para o treinamento de modelos. Os recortes podem ser lidos das pastas de classificação ou
+    # refeitos a partir dos vídeos originais, com as coordenadas registradas no catálogo.
+    #
+    # Cada exportação é uma pasta (Exportacao/<nome>) com uma subpasta por classe e um arquivo
+    # manifest.json, que registra a versão da exportação, os parâmetros e a assinatura de cada
+    # item. Ao executar novamente, apenas os itens novos ou alterados são gravados, e os itens
+    # que não existem mais no catálogo são removidos; a versão é incrementada quando há mudanças
+
+    def __init__(self, size=224, name=None, root="Exportacao", video_dir=None, classes=None,
+                 workers=None, batch_size=256):
+
+        self.size = size
+        self.output_dir = os.path.join(root, name or f"{size}x{size}")
+        self.video_dir = video_dir  # Quando informada, os recortes são refeitos a partir dos vídeos
+        self.classes = classes or ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+        self.workers = workers
+        self.batch_size = batch_size
+        self.manifest_path = os.path.join(self.output_dir, "manifest.json")
+
+    def parameters(self):
+
+        # 'enquadramento' força a reexportação das versões em que os recortes retangulares eram esticados
+        return {"tamanho": self.size, "origem": "videos" if self.video_dir else "recortes",
+                "enquadramento": "preenchimento"}
+
+    def load_manifest(self):
+
+        # Carrega o manifesto da exportação anterior. Caso os parâmetros tenham mudado
+        # (ex: origem diferente), todos os itens são exportados novamente
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path, "r", encoding="utf-8") as file:
+                    manifest = json.load(file)
+                if manifest.get("parametros") == self.parameters():
+                    return manifest
+                print("Parâmetros da exportação alterados, todos os itens serão exportados novamente")
+                return {"versao": manifest.get("versao", 0), "itens": {}}
+            except (ValueError, OSError) as e:
+                print(f"Manifesto inválido, todos os itens serão exportados novamente: {e}")
+
+        return {"versao": 0, "itens": {}}
+
+    def save_manifest(self, manifest):
+
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    def catalog_items(self):
+
+        # Retorna {destino: dados do item} para os recortes do catálogo das classes selecionadas.
+        # A assinatura combina o hash dos pixels do recorte e as coordenadas registradas
+        catalog = Catalog()
+        rows = catalog.connection.execute(
+            "SELECT caminho, classe, video, frame, x1, x2, y1, y2, md5 FROM recortes").fetchall()
+        catalog.close()
+
+        items = {}
+        for path, class_name, video_name, frame, x1, x2, y1, y2, md5 in rows:
+            if class_name not in self.classes:
+                continue
+
+            target = os.path.join(class_name, os.path.splitext(os.path.basename(path))[0] + ".png")
+            coords = None if x1 is None else [x1, x2, y1, y2]
+            items[target.replace(os.sep, "/")] = {"origem": path, "classe": class_name, "video": video_name,
+                                                 "frame": frame, "coordenadas": coords,
+                                                 "assinatura": f"{md5}:{coords}"}
+
+        return items
+
+    def run(self):
+
+        # Exporta os itens novos ou alterados, distribuindo o trabalho entre um conjunto de processos
+        start = time.perf_counter()
+
+        for class_name in self.classes:
+            os.makedirs(os.path.join(self.output_dir, class_name), exist_ok=True)
+
+        manifest = self.load_manifest()
+        previous = manifest["itens"]
+        items = self.catalog_items()
+
+        pending = {target: item for target, item in items.items()
+                   if previous.get(target, {}).get("assinatura") != item["assinatura"]
+                   or not os.path.exists(os.path.join(self.output_dir, target))}
+        obsolete = [target for target in previous if target not in items]
+
+        # Remove os itens que não existem mais no catálogo
+        for target in obsolete:
+            out_path = os.path.join(self.output_dir, target)
+            if os.path.exists(out_path):
+                os.remove(out_path)
+
+        written, errors = self.export(pending)
+
+        manifest["itens"] = {target: item for target, item in items.items()
+                             if target not in pending or target in written}
+        if written or obsolete:
+            manifest["versao"] = manifest.get("versao", 0) + 1
+        manifest["parametros"] = self.parameters()
+        manifest["atualizado_em"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.save_manifest(manifest)
+
+        for source in errors:
+            print(f"Erro ao exportar {source}")
+
+        print(f"Exportação {self.output_dir} (versão {manifest['versao']}): {len(written)} itens gravados, "
+              f"{len(items) - len(pending)} inalterados, {len(obsolete)} removidos, {len(errors)} erros "
+              f"em {time.perf_counter() - start:.1f}s")
+
+        return len(written)
+
+    def export(self, pending):
+
+        # Distribui os itens pendentes entre os processos: lotes de recortes salvos ou,
+        # com a pasta de vídeos, um processo por vídeo (decodificação sequencial)
+        written = set()
+        errors = []
+
+        if not pending:
+            return written, errors
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+
+            futures = []
+
+            if self.video_dir:
+                videos = AugmentationMaterializer(self.video_dir).find_videos()
+                grouped = {}
+
+                for target, item in pending.items():
+                    if item["video"] not in videos or item["frame"] is None or item["coordenadas"] is None:
+                        errors.append(item["origem"])
+                        continue
+                    frames = grouped.setdefault(item["video"], {})
+                    frames.setdefault(item["frame"], []).append((item["origem"], target, tuple(item["coordenadas"])))
+
+                for video_name, frames in grouped.items():
+                    futures.append(pool.submit(export_video, videos[video_name], frames, self.output_dir, self.size))
+            else:
+                batch = list(pending.items())
+                for i in range(0, len(batch), self.batch_size):
+                    items = [(item["origem"], target) for target, item in batch[i:i + self.batch_size]]
+                    futures.append(pool.submit(export_batch, items, self.output_dir, self.size))
+
+            for future in as_completed(futures):
+                done, failed = future.result()
+                written.update(done)
+                errors.extend(failed)
+
+        return written, errors
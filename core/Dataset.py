@@ -0,0 +1,359 @@
+import os
+
+from .AugmentationStore import AugmentationStore
+from .Catalog import Catalog
+
+
+class Dataset:
+
+    # Classe responsável pela lógica da base de dados de recortes (pastas de classificação,
+    # caminhos dos frames, verificação de duplicatas e registros de Augmentation).
+    # Não depende do PyQt5, podendo ser utilizada em scripts e servidores sem interface gráfica.
+    # A classe Model (interface) herda desta classe, acrescentando as funções que dependem do Qt
+
+    def __init__(self):
+
+        # Inicialização do caminho dos arquivos JSON para augmentation
+        self.json_file_path = None
+
+        # Catálogo de recortes, aberto no primeiro uso (ver catalog)
+        self._catalog = None
+
+    def catalog(self):
+
+        # Retorna o catálogo de recortes desta instância. A sincronização com as pastas (reconcile)
+        # é verificada apenas na abertura: as inclusões e exclusões feitas depois passam pelo próprio
+        # catálogo, que registra o estado das pastas, evitando que uma gravação de imagem (que altera
+        # o mtime da pasta) provoque uma nova leitura de todos os recortes a cada salvamento.
+        # A conexão SQLite pertence à thread que abriu o catálogo: cada thread deve usar sua instância
+        if self._catalog is None:
+            self._catalog = Catalog()
+
+        return self._catalog
+
+    def close_catalog(self):
+
+        # Fecha a conexão com o catálogo (reaberta no próximo uso)
+        if self._catalog is not None:
+            self._catalog.close()
+            self._catalog = None
+
+    def manage_dirs(self, folder_name):
+
+        # cria o diretório para armazenar os frames (caso não exista previamente)
+        os.makedirs(folder_name, exist_ok=True)
+
+    def frame_path_generator(self, frame_number, folder_name, video_name, index):
+
+        # Função responsável por gerar o caminho dos frames à serem salvos
+        # levando em consideração o numero do frame, o nome de sua classe, o nome do vídeo
+        # correspondente ao frame e qual o frame retirado da imagem principal
+
+        # O numero do frame é desconhecido quando não foi possível obter o FPS do vídeo
+        if frame_number is None:
+            frame_number = 'unknown'
+
+        # Retorno da string do caminho
+        return os.path.join(folder_name, f"frame_{frame_number}_{video_name}_{index}.png")
+
+    def remove_file(self, path):
+
+        # Remove o arquivo designado pelo caminho 'path'
+        os.remove(path)
+
+    def file_exists(self, path):
+
+        # Verifica se o caminho especificado em path existe ou não
+        return os.path.exists(path)
+
+    def list_directory(self, path):
+
+        # Retorna todos os itens contido no caminho
+        # especificado pelo caminho 'path'
+        return os.listdir(path)
+
+    def join_path(self, image_path, path):
+
+        # Retorna o caminho completo do frame, unindo o caminho
+        # especificado ao nome do frame
+        return os.path.join(path, image_path)
+
+    def validate_type(self, image_path):
+
+        # Valida se o arquivo da pasta possui a terminação '.png' ou '.jpg'
+        # Em outras palavras, é validado se o arquivo é uma imagem. Caso não seja
+        # validado, ele será apenas ignorado
+        return image_path.lower().endswith(('.png', '.jpg'))
+
+    '''
+    def check_existence(self, frame):
+
+        # Função responsável por verificar se um frame a ser salvo já existe
+        # dentro de alguma das pastas de classificação definida por 'folders'
+        folders = ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+
+        # Loop para percorrer cada uma das pastas existentes
+        for dirs in folders:
+
+            # Pula uma das pastas caso ela não tenha sido criado
+            if not os.path.exists(dirs):
+                continue
+
+            # Loop para percorrer cada um dos frame presentes na pasta selecionada
+            for img_file in os.listdir(dirs):
+
+                # Caminho completo do arquivo
+                img_path = os.path.join(dirs, img_file)
+
+                # Carrega a imagem salva da pasta
+                saved_image = cv2.imread(img_path)
+
+                # Continua a execução caso a imagem avaliada não exista
+                if saved_image is None:
+                    print(f"Erro ao carregar {img_path}")
+                    continue
+
+                # Valida se a imagem a ser salva já existe (tendo sido salva préviamente)
+                # Em caso afirmativo, o frame salvo previamente é excluído
+                
+                if saved_image.shape == frame.shape and np.array_equal(saved_image, frame):
+                    print(f"Imagem duplicada encontrada e removida: {img_path}")
+                    os.remove(img_path)  # Remove a imagem duplicada
+                    return True
+
+        return False
+    '''
+
+    def check_existence(self, frame, video_name):
+
+        # Função responsável por verificar se um frame a ser salvo já existe
+        # dentro de alguma das pastas de classificação. A verificação é uma consulta
+        # ao catálogo de recortes (vídeo, hash), sem percorrer as pastas
+        catalog = self.catalog()
+
+        # Consulta o catálogo pelo par (vídeo, hash do frame atual)
+        img_path = catalog.find_by_hash(catalog.frame_hash(frame), video_name)
+
+        if img_path is not None:
+            print(f"Imagem duplicada detectada: {img_path}")
+            os.remove(img_path)  # Remove a imagem duplicada
+            catalog.remove(img_path)
+            return True  # já existe
+
+        return False  # não existe ainda
+
+    def register_crop(self, frame, frame_path, video_name, frame_number, index, coords=None, dimensions=None):
+
+        # Registra no catálogo um recorte que acabou de ser salvo, juntamente com seus hashes
+        # (o perceptual é utilizado na busca por quase-duplicatas)
+        self.catalog().add(frame_path, frame, video_name, frame_number, index, coords, dimensions)
+
+    def unregister_crops(self, frame_paths):
+
+        # Remove do catálogo os recortes excluídos (um caminho ou uma lista de caminhos).
+        # Retorna {caminho: classe} dos recortes removidos
+        return self.catalog().remove(frame_paths)
+
+    def list_crops(self, video_name, folder_name=None):
+
+        # Retorna os caminhos dos recortes do vídeo (de uma classe ou de todas), pelo catálogo
+        return self.catalog().crops(video_name, folder_name)
+
+    def write_image(self, path, image):
+
+        # Salva a imagem de forma atômica: o PNG é codificado em memória, gravado em um arquivo
+        # temporário e então renomeado. Uma interrupção nunca deixa um recorte incompleto na pasta
+        import cv2
+
+        ok, buffer = cv2.imencode(".png", image)
+        if not ok:
+            return False
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(buffer.tobytes())
+        os.replace(tmp_path, path)
+
+        return True
+
+    def save_capture(self, crop, folder_name, video_name, frame_number, index, coords, dimensions):
+
+        # Função responsável por todo o salvamento de um recorte: verificação de duplicatas,
+        # gravação da imagem, catálogo de recortes e registros de Augmentation dos frames vizinhos.
+        # coords = (x1, x2, y1, y2) e dimensions = (largura, altura), em pixels do vídeo original.
+        # Retorna (caminho do recorte ou None em caso de erro, flag de duplicata)
+
+        # Criação da pasta da categoria e, caso ainda não exista, da estrutura de pastas de Augmentation
+        self.manage_dirs(folder_name)
+        if not os.path.exists("Augmentation"):
+            self.Augmentation_folder_structure()
+
+        # Caso o recorte já tenha sido salvo anteriormente, o arquivo anterior é removido
+        # e apenas o salvamento atual é mantido
+        duplicate = self.check_existence(crop, video_name)
+
+        # Gerar o caminho do frame a ser salvo, levando em consideração o numero do frame,
+        # nome da pasta, nome do vídeo e índice do recorte
+        frame_path = self.frame_path_generator(frame_number, folder_name, video_name, index)
+
+        if not self.write_image(frame_path, crop):
+            return None, duplicate
+
+        # Registra o recorte salvo no catálogo
+        self.register_crop(crop, frame_path, video_name, frame_number, index, coords, dimensions)
+
+        x1, x2, y1, y2 = coords
+        aug_list = []
+        # O 'for' busca obter os 10 frames anteriores e posteriores
+        # ao frame atual, afim de salvar seus dados para o processo
+        # de Augmentation futuro (apenas quando o numero do frame é conhecido)
+        for i in range(-10, 11):
+            if frame_number is not None and frame_number + i >= 1 and i != 0:
+                # Retorna a estrutura dos dados em formato JSON
+                aug_list.append(self.Augmentation_data_structure(frame_number + i, x1, x2, y1, y2,
+                                                                 video_name, frame_path, dimensions))
+
+        # Verifica duplicatas nas pastas de augmentation e as exclui em caso afirmativo
+        self.Augmentation_data_checker(aug_list)
+
+        # Salva a estrutura JSON no arquivo gerado na pasta Augmentation
+        self.Augmentation_data_save(aug_list, folder_name)
+
+        return frame_path, duplicate
+
+    # ------------------------------------------------------------------------------------------------------------------
+    #    FUNÇÕES REFERENTES AO TRATAMENTO DE DADOS DE AUGMENTATION
+    # ------------------------------------------------------------------------------------------------------------------
+
+    def Augmentation_folder_structure(self):
+
+        # A função organiza a estrutura de subpastas
+        # cada uma conterá um arquivo com os dados dos frames
+        # à serem salvos para o aumento de dados
+        aug = 'Augmentation'
+        os.makedirs(aug, exist_ok=True)
+
+        subfolders = ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+        for sub in subfolders:
+            sub_path = os.path.join(aug, sub)
+            os.makedirs(sub_path, exist_ok=True)
+
+            '''
+            obs: A forma como o os.path.join opera é unindo o 
+            caminho pré-formado do primeiro argumento com o nome
+            da pasta ou arquivo do segundo parâmetro, completando
+            o caminho até determinado documento
+            '''
+            json_file_name = f"Augmentation_{sub}.json"
+            self.json_file_path = os.path.join(sub_path, json_file_name)
+
+            '''
+            obs2: A função with open(txt_file_name, "w") as file
+            cria o arquivo txt definido pelo caminho gerado em 
+            txt_file_path e permite realizar alguma operação inicial
+            de acordo com o segundo parâmetro, sendo
+                'w' - write
+                'r' - read   
+            como nada deve ser escrito por enquanto, utiliza-se o pass
+            para sair da função 
+            '''
+            with open(self.json_file_path, "w") as file:
+                pass
+
+    def Augmentation_data_structure(self, frame_number, x1, x2, y1, y2, video_name, frame_path, dimensions=None):
+
+        # Função responsável por gerar a estrutura em JSON a ser salva
+        dataStructure = {
+            "nome do video": video_name,
+            "frame": frame_number,
+            "coordenadas": {"x1": x1,
+                            "x2": x2,
+                            "y1": y1,
+                            "y2": y2},
+            "caminho": frame_path
+        }
+
+        # Quando informadas, as dimensões (largura, altura) do frame original indicam que as
+        # coordenadas estão em pixels do vídeo, e não da imagem redimensionada para exibição
+        if dimensions is not None:
+            dataStructure["dimensoes"] = {"largura": dimensions[0], "altura": dimensions[1]}
+
+        return dataStructure
+
+    def Augmentation_data_save(self, new_data, folder_name):
+
+        # Função responsável por salvar novos registros da classe 'folder_name'.
+        # Os registros são apenas acrescentados ao diário (NDJSON) da classe, sem
+        # carregar e reescrever todo o arquivo JSON a cada captura
+        AugmentationStore(folder_name).append(new_data)
+
+    def Augmentation_compact(self):
+
+        # Função responsável por incorporar os diários de cada classe aos arquivos
+        # JSON, mantendo o formato original (lista de registros) para consumidores externos
+        folders = ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+
+        for dirs in folders:
+            AugmentationStore(dirs).compact()
+
+    def Augmentation_key(self, reg):
+
+        # Retorna uma chave imutável (hashable) que identifica o registro, desconsiderando
+        # o caminho do recorte: (vídeo, frame, x1, x2, y1, y2)
+        coords = reg["coordenadas"]
+        return reg["nome do video"], reg["frame"], coords["x1"], coords["x2"], coords["y1"], coords["y2"]
+
+    def Augmentation_data_checker(self, new_data_list):
+
+        # Função responsável por validar se um registro a ser salvo já existe
+        # em alguns dos outros arquivos JSON existentes em diferentes classes,
+        # as quais são definidas pela variável 'folders'
+        #folders = ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+        folders = ["Incerto", "Muita dor"]
+        found = False  # marca se algum foi removido
+
+        # Conjunto das chaves dos novos registros, construído uma única vez.
+        # A verificação de conflito passa a ser uma consulta ao conjunto (O(1)) por registro
+        new_keys = {self.Augmentation_key(r) for r in new_data_list}
+
+        # Loop para percorrer cada uma das classes (pastas)
+        for dirs in folders:
+
+            # Caso alguma não exista, o código deve continuar normalmente
+            if not os.path.exists(dirs):
+                continue
+
+            # Remove todos os registros duplicados (presentes em new_data_list). A leitura e a
+            # reescrita da classe são feitas com o lock do AugmentationStore, pois as exclusões
+            # feitas em SaveMenu (interface) podem ocorrer ao mesmo tempo que o salvamento (CropWriter)
+            if AugmentationStore(dirs).remove_where(lambda register: self.Augmentation_key(register) in new_keys):
+                found = True
+
+        return found
+
+    def Augmentation_data_delete(self, image_paths, classes=None):
+
+        # Função responsável por excluir registros do JSON, caso ele contenha o caminho
+        # de um (ou mais) frames excluídos em SaveMenu. Os registros de um recorte ficam apenas
+        # no arquivo da classe em que ele foi salvo, obtida do catálogo ('classes', retornado por
+        # unregister_crops) ou da pasta do recorte. Cada classe afetada é lida e escrita uma única
+        # vez, e apenas quando algum registro foi de fato removido
+        if isinstance(image_paths, str):
+            image_paths = [image_paths]
+        classes = classes or {}
+
+        # Agrupa os caminhos pela classe dona dos registros: {classe: {caminhos}}
+        by_class = {}
+        for image_path in image_paths:
+            class_name = classes.get(image_path) or os.path.basename(os.path.dirname(image_path))
+            by_class.setdefault(class_name, set()).add(image_path)
+
+        removed = 0
+        for class_name, paths in by_class.items():
+
+            # Remove os registros que possuem os caminhos excluídos (compactando o diário),
+            # com o lock da classe, já que a thread de salvamento pode estar gravando registros
+            removed += AugmentationStore(class_name).remove_where(
+                lambda registro, paths=paths: registro.get("caminho") in paths)
+
+        return removed
@@ -0,0 +1,115 @@
+import os
+import json
+import bisect
+import hashlib
+
+import cv2
+
+
+class FrameIndex:
+
+    # Classe responsável pela tabela de timestamps (PTS) de cada frame de um vídeo, na ordem
+    # de decodificação. Com ela, o numero do frame passa a ser obtido pela posição do timestamp
+    # na tabela, e não por tempo * FPS, o que é incorreto em vídeos com taxa de quadros variável
+    # (comum em gravações de celular) e acumula erro em vídeos longos.
+    # A tabela é construída uma única vez por vídeo e salva em FrameIndex/<hash do arquivo>.json
+
+    def __init__(self, video_path, cache_dir="FrameIndex"):
+
+        self.video_path = video_path
+        self.cache_dir = cache_dir
+        self.timestamps = []  # Tempo (ms) de cada frame, em ordem crescente
+
+    @staticmethod
+    def file_key(video_path, chunk_size=1 << 20):
+
+        # Hash do arquivo de vídeo baseado no seu tamanho e no conteúdo do primeiro e do último MB,
+        # suficiente para identificar o arquivo sem precisar ler vídeos de vários GB por completo
+        size = os.path.getsize(video_path)
+        digest = hashlib.sha1(str(size).encode("utf-8"))
+
+        with open(video_path, "rb") as file:
+            digest.update(file.read(chunk_size))
+            if size > chunk_size:
+                file.seek(max(chunk_size, size - chunk_size))
+                digest.update(file.read(chunk_size))
+
+        return digest.hexdigest()
+
+    def cache_path(self):
+
+        return os.path.join(self.cache_dir, f"{self.file_key(self.video_path)}.json")
+
+    def load_or_build(self):
+
+        # Carrega a tabela salva em disco ou, caso não exista, a constrói percorrendo o vídeo.
+        # Quando o OpenCV não consegue decodificar o vídeo, a tabela fica vazia e não é salva:
+        # quem a utiliza deve manter a estimativa por FPS (ver FrameGrabber.set_frame_index)
+        cache_path = self.cache_path()
+
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as file:
+                    self.timestamps = json.load(file)["timestamps"]
+                if self.timestamps:
+                    return self
+                print("Tabela de timestamps vazia, será reconstruída")
+            except (ValueError, KeyError, OSError) as e:
+                print(f"Tabela de timestamps inválida, será reconstruída: {e}")
+
+        self.build()
+
+        if not self.timestamps:
+            print(f"Não foi possível ler os frames de {os.path.basename(self.video_path)} com o OpenCV")
+            return self
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"video": os.path.basename(self.video_path), "timestamps": self.timestamps}, file)
+        os.replace(tmp_path, cache_path)
+
+        return self
+
+    def build(self):
+
+        # Percorre o vídeo sequencialmente registrando o timestamp de cada frame.
+        # grab() apenas avança o decodificador, sem converter o frame para BGR
+        capture = cv2.VideoCapture(self.video_path)
+        timestamps = []
+
+        while capture.grab():
+            timestamps.append(capture.get(cv2.CAP_PROP_POS_MSEC))
+
+        capture.release()
+
+        # Garante a ordem crescente exigida pela busca binária
+        for i in range(1, len(timestamps)):
+            if timestamps[i] < timestamps[i - 1]:
+                timestamps[i] = timestamps[i - 1]
+
+        self.timestamps = timestamps
+
+    def __len__(self):
+
+        return len(self.timestamps)
+
+    def frame_for_time(self, current_time):
+
+        # Retorna o índice do frame exibido no tempo 'current_time' (ms),
+        # ou seja, o último frame cujo timestamp é menor ou igual ao tempo informado
+        if not self.timestamps:
+            return 0
+
+        # Tolerância de 0.5 ms para arredondamentos do tempo informado pelo player
+        return max(0, bisect.bisect_right(self.timestamps, current_time + 0.5) - 1)
+
+    def time_for_frame(self, frame_number):
+
+        # Retorna o timestamp (ms) do frame 'frame_number' (limitado ao intervalo do vídeo)
+        if not self.timestamps:
+            return 0
+
+        frame_number = min(max(0, frame_number), len(self.timestamps) - 1)
+        return self.timestamps[frame_number]
+
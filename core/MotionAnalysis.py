@@ -0,0 +1,175 @@
+import os
+import json
+
+import cv2
+import numpy as np
+
+from .FrameIndex import FrameIndex
+
+
+class MotionAnalysis:
+
+    # Classe responsável por sugerir frames candidatos à captura, evitando que o vídeo inteiro
+    # seja percorrido manualmente. O vídeo é decodificado uma única vez em baixa resolução e,
+    # para cada frame analisado, são calculadas três medidas:
+    #   - movimento: diferença média absoluta em relação ao frame analisado anterior;
+    #   - histograma: mudança da distribuição de tons (mudanças de cena, de iluminação);
+    #   - nitidez: variância do Laplaciano (frames borrados são desfavorecidos).
+    # As medidas são calculadas com NumPy em lotes de frames e salvas em
+    # MotionAnalysis/<hash do arquivo>.json, de forma que a análise ocorre uma única vez por vídeo
+
+    def __init__(self, video_path, cache_dir="MotionAnalysis", width=160, stride=2, batch_size=64):
+
+        self.video_path = video_path
+        self.cache_dir = cache_dir
+        self.width = width  # Largura dos frames analisados (a altura mantém a proporção)
+        self.stride = stride  # Intervalo (em frames) entre os frames analisados
+        self.batch_size = batch_size  # Quantidade de frames processados por lote
+
+        self.frames = []  # Índice de cada frame analisado
+        self.times = []  # Tempo (ms) de cada frame analisado
+        self.motion = []
+        self.histogram = []
+        self.sharpness = []
+
+    def cache_path(self):
+
+        return os.path.join(self.cache_dir, f"{FrameIndex.file_key(self.video_path)}.json")
+
+    def load_or_build(self):
+
+        # Carrega as medidas salvas em disco ou, caso não existam, analisa o vídeo
+        cache_path = self.cache_path()
+
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as file:
+                    data = json.load(file)
+                self.frames = data["frames"]
+                self.times = data["tempos"]
+                self.motion = data["movimento"]
+                self.histogram = data["histograma"]
+                self.sharpness = data["nitidez"]
+                return self
+            except (ValueError, KeyError, OSError) as e:
+                print(f"Análise de movimento inválida, será refeita: {e}")
+
+        self.build()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"video": os.path.basename(self.video_path), "frames": self.frames, "tempos": self.times,
+                       "movimento": self.motion, "histograma": self.histogram, "nitidez": self.sharpness}, file)
+        os.replace(tmp_path, cache_path)
+
+        return self
+
+    def score_batch(self, batch, previous):
+
+        # Calcula as medidas de um lote de frames (array N x altura x largura, uint8).
+        # 'previous' é o último frame do lote anterior (ou None no início do vídeo)
+        frames = batch.astype(np.float32)
+        count = len(frames)
+
+        # Movimento: diferença média absoluta entre frames consecutivos
+        chained = frames if previous is None else np.concatenate([previous[None].astype(np.float32), frames])
+        motion = np.abs(np.diff(chained, axis=0)).mean(axis=(1, 2))
+        if previous is None:
+            motion = np.concatenate([[0.0], motion])
+
+        # Histograma de 32 faixas de cada frame, calculado para todo o lote com um único bincount
+        bins = (batch >> 3).reshape(count, -1).astype(np.int64) + (np.arange(count) * 32)[:, None]
+        histograms = np.bincount(bins.ravel(), minlength=count * 32).reshape(count, 32)
+        histograms = histograms / histograms.sum(axis=1, keepdims=True)
+
+        previous_histogram = histograms[:1] if previous is None else \
+            np.bincount(previous.ravel() >> 3, minlength=32)[None] / previous.size
+        histogram = 0.5 * np.abs(np.diff(np.concatenate([previous_histogram, histograms]), axis=0)).sum(axis=1)
+
+        # Nitidez: variância do Laplaciano (4 vizinhos), calculado para todo o lote
+        laplacian = 4 * frames[:, 1:-1, 1:-1] - frames[:, :-2, 1:-1] - frames[:, 2:, 1:-1] \
+            - frames[:, 1:-1, :-2] - frames[:, 1:-1, 2:]
+        sharpness = laplacian.reshape(count, -1).var(axis=1)
+
+        return motion, histogram, sharpness
+
+    def build(self):
+
+        # Percorre o vídeo sequencialmente, convertendo apenas os frames analisados
+        capture = cv2.VideoCapture(self.video_path)
+        size = None
+        batch, batch_frames, batch_times = [], [], []
+        previous = None
+        frame_number = 0
+
+        self.frames, self.times, self.motion, self.histogram, self.sharpness = [], [], [], [], []
+
+        def flush():
+
+            nonlocal previous
+            stacked = np.stack(batch)
+            motion, histogram, sharpness = self.score_batch(stacked, previous)
+            previous = stacked[-1]
+
+            self.frames.extend(batch_frames)
+            self.times.extend(batch_times)
+            self.motion.extend(round(float(v), 3) for v in motion)
+            self.histogram.extend(round(float(v), 4) for v in histogram)
+            self.sharpness.extend(round(float(v), 1) for v in sharpness)
+            batch.clear()
+            batch_frames.clear()
+            batch_times.clear()
+
+        while capture.grab():
+
+            if frame_number % self.stride == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    if size is None:
+                        height, width = frame.shape[:2]
+                        size = (self.width, max(3, int(height * self.width / width)))
+
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    batch.append(cv2.resize(gray, size, interpolation=cv2.INTER_AREA))
+                    batch_frames.append(frame_number)
+                    batch_times.append(capture.get(cv2.CAP_PROP_POS_MSEC))
+
+                    if len(batch) == self.batch_size:
+                        flush()
+
+            frame_number += 1
+
+        if batch:
+            flush()
+
+        capture.release()
+
+    def candidates(self, max_count=50, min_gap_ms=1000):
+
+        # Retorna os tempos (ms) dos frames sugeridos, em ordem crescente. A pontuação combina
+        # movimento e mudança de histograma (normalizados pela mediana do vídeo); frames pouco
+        # nítidos são descartados. São escolhidos os picos, separados por pelo menos 'min_gap_ms'
+        if len(self.times) < 3:
+            return []
+
+        motion = np.array(self.motion)
+        histogram = np.array(self.histogram)
+        sharpness = np.array(self.sharpness)
+
+        score = motion / (np.median(motion) + 1e-6) + histogram / (np.median(histogram) + 1e-6)
+        score[sharpness < 0.5 * np.median(sharpness)] = 0
+
+        # Picos locais acima do percentil 90 da pontuação
+        peaks = np.flatnonzero((score[1:-1] >= score[:-2]) & (score[1:-1] >= score[2:]) &
+                               (score[1:-1] > np.percentile(score, 90))) + 1
+
+        chosen = []
+        for position in peaks[np.argsort(-score[peaks])]:
+            time = self.times[position]
+            if all(abs(time - other) >= min_gap_ms for other in chosen):
+                chosen.append(time)
+                if len(chosen) == max_count:
+                    break
+
+        return sorted(chosen)
@@ -0,0 +1,99 @@
+import os
+import time
+
+import cv2
+
+from .FrameIndex import FrameIndex
+
+
+class ProxyGenerator:
+
+    # Classe responsável por gerar uma cópia leve (proxy) de um vídeo, utilizada apenas na
+    # reprodução: resolução reduzida e codificação MJPG, em que todos os frames são independentes
+    # (sem GOP), tornando o reposicionamento e as velocidades de 2x/4x fluidos no VLC.
+    # O proxy possui exatamente os mesmos frames do original, na ordem de decodificação e com o
+    # mesmo FPS: o frame i do proxy corresponde ao frame i do original, o que permite converter o
+    # tempo do proxy no frame do original. As capturas continuam sendo feitas no vídeo original.
+    # O proxy é salvo em Proxy/<hash do arquivo>.avi
+
+    def __init__(self, video_path, cache_dir="Proxy", height=540):
+
+        self.video_path = video_path
+        self.cache_dir = cache_dir
+        self.height = height  # Altura do proxy (vídeos menores são mantidos na resolução original)
+
+    def proxy_path(self):
+
+        return os.path.join(self.cache_dir, f"{FrameIndex.file_key(self.video_path)}.avi")
+
+    def exists(self):
+
+        # Um proxy vazio (ex: gerado por uma versão anterior quando o codec falhou) não é válido
+        proxy_path = self.proxy_path()
+        return os.path.exists(proxy_path) and os.path.getsize(proxy_path) > 0
+
+    def build(self):
+
+        # Gera o proxy (caso ainda não exista) e retorna seu caminho, ou None em caso de erro.
+        # O vídeo é gravado em um arquivo temporário e renomeado ao final, de forma que
+        # um proxy incompleto nunca é utilizado
+        proxy_path = self.proxy_path()
+        if self.exists():
+            return proxy_path
+        if os.path.exists(proxy_path):
+            os.remove(proxy_path)
+
+        capture = cv2.VideoCapture(self.video_path)
+        if not capture.isOpened():
+            print(f"Erro ao abrir {self.video_path}")
+            return None
+
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = proxy_path[:-4] + ".tmp.avi"
+
+        start = time.perf_counter()
+        writer = None
+        size = None
+        frames = 0
+
+        try:
+            while True:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+
+                if writer is None:
+                    height, width = frame.shape[:2]
+                    scale = min(1.0, self.height / height)
+                    # Dimensões pares, exigidas por alguns decodificadores
+                    size = (int(width * scale) // 2 * 2, int(height * scale) // 2 * 2)
+                    writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+
+                    # O codec pode não estar disponível: nesse caso nada é gravado
+                    if not writer.isOpened():
+                        print(f"Erro ao criar o proxy de {os.path.basename(self.video_path)}: codec MJPG indisponível")
+                        break
+
+                if frame.shape[1] != size[0] or frame.shape[0] != size[1]:
+                    frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+                writer.write(frame)
+                frames += 1
+        finally:
+            capture.release()
+            if writer is not None:
+                writer.release()
+
+        # Proxies incompletos ou vazios são descartados, e a reprodução continua no vídeo original
+        if frames == 0 or not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+        os.replace(tmp_path, proxy_path)
+
+        print(f"Proxy de {os.path.basename(self.video_path)}: {frames} frames {size[0]}x{size[1]} "
+              f"em {time.perf_counter() - start:.1f}s")
+
+        return proxy_path
@@ -0,0 +1,246 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+from .AugmentationStore import AugmentationStore
+from .AugmentationMaterializer import AugmentationMaterializer
+
+
+# Número do frame de origem, obtido do nome do recorte: frame_<numero>_<video>_<indice>.png
+ORIGIN_PATTERN = re.compile(r"^frame_(\d+)_")
+
+
+def origin_frame(frame_path):
+
+    # Retorna o número do frame em que o recorte foi feito (ou None, caso desconhecido)
+    match = ORIGIN_PATTERN.match(os.path.basename(frame_path))
+    return int(match.group(1)) if match else None
+
+
+def match_box(gray, template, box, margin):
+
+    # Procura o template ao redor da caixa 'box' (x, y, lado), em uma região ampliada por
+    # 'margin' vezes o lado. Retorna a nova caixa e a similaridade (TM_CCOEFF_NORMED)
+    height, width = gray.shape[:2]
+    x, y, side = box
+    pad = int(side * margin)
+
+    left, top = max(0, x - pad), max(0, y - pad)
+    right, bottom = min(width, x + side + pad), min(height, y + side + pad)
+    region = gray[top:bottom, left:right]
+
+    if region.shape[0] < template.shape[0] or region.shape[1] < template.shape[1]:
+        return box, 0.0
+
+    result = cv2.matchTemplate(region, template, cv2.TM_CCOEFF_NORMED)
+    _, score, _, location = cv2.minMaxLoc(result)
+
+    return (left + location[0], top + location[1], side), float(score)
+
+
+def track_roi(frames, origin, box, radius, margin, min_score):
+
+    # Acompanha a caixa do frame de origem nos frames vizinhos (para frente e para trás).
+    # O template é sempre o recorte do frame de origem, evitando o acúmulo de desvios;
+    # a busca parte da posição encontrada no frame anterior da sequência.
+    # Retorna {frame: ((x, y, lado), similaridade)} para os frames presentes em 'frames'
+    x, y, side = box
+    template = frames[origin][y:y + side, x:x + side]
+    tracked = {}
+
+    if template.size == 0:
+        return tracked
+
+    for step in (1, -1):
+        current = box
+        for offset in range(1, radius + 1):
+            frame_number = origin + step * offset
+            if frame_number not in frames:
+                break
+
+            found, score = match_box(frames[frame_number], template, current, margin)
+
+            # Com baixa similaridade (oclusão, borrão) a caixa anterior é mantida
+            if score >= min_score:
+                current = found
+            tracked[frame_number] = (current, score)
+
+    return tracked
+
+
+def track_video(video_path, rois, radius=10, margin=0.5, min_score=0.5, scale=0.5):
+
+    # Função executada em um processo separado para cada vídeo. O vídeo é decodificado uma
+    # única vez, de forma sequencial; cada frame necessário é convertido para tons de cinza
+    # e reduzido por 'scale' uma única vez, sendo compartilhado por todos os recortes.
+    # rois: lista de (frame de origem, (x1, x2, y1, y2)) em pixels do vídeo original.
+    # Retorna (caminho, {(origem, x1, x2, y1, y2): {frame: (x1, x2, y1, y2, similaridade)}},
+    #          frames lidos, tempo, erro)
+    start = time.perf_counter()
+    capture = cv2.VideoCapture(video_path)
+
+    if not capture.isOpened():
+        return video_path, {}, 0, 0.0, f"Erro ao abrir {video_path}"
+
+    # Recortes ordenados pelo frame de origem: cada um é processado assim que o
+    # último frame vizinho é lido, e os frames que não são mais necessários são descartados
+    pending = sorted(set(rois))
+    last_frame = pending[-1][0] + radius
+    frames = {}
+    results = {}
+    size = None  # (largura, altura) do frame original
+    frame_number = 0
+
+    def process(until):
+
+        # Processa os recortes cujo último vizinho já foi lido (ou todos, ao final do vídeo)
+        while pending and pending[0][0] + radius <= until:
+            origin, (x1, x2, y1, y2) = pending.pop(0)
+
+            if origin not in frames:
+                continue
+
+            box = (int(x1 * scale), int(y1 * scale), max(1, int((x2 - x1) * scale)))
+            tracked = track_roi(frames, origin, box, radius, margin, min_score)
+
+            # Conversão para pixels do vídeo original, mantendo o lado do recorte original
+            # e limitando a caixa ao tamanho do frame
+            side = x2 - x1
+            boxes = {}
+            for number, ((x, y, _), score) in tracked.items():
+                x = min(int(round(x / scale)), size[0] - side)
+                y = min(int(round(y / scale)), size[1] - side)
+                boxes[number] = (x, x + side, y, y + side, score)
+            results[(origin, x1, x2, y1, y2)] = boxes
+
+        first_needed = pending[0][0] - radius if pending else until + 1
+        for number in [n for n in frames if n < first_needed]:
+            del frames[number]
+
+    while frame_number <= last_frame:
+
+        if not capture.grab():
+            break
+
+        # Apenas os frames dentro da vizinhança de algum recorte pendente são convertidos.
+        # Os recortes pendentes ainda não alcançaram o último vizinho, então basta comparar
+        # o frame com o início da vizinhança do primeiro recorte pendente
+        if pending and frame_number >= pending[0][0] - radius:
+            ok, frame = capture.retrieve()
+            if ok:
+                size = frame.shape[1], frame.shape[0]
+                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                frames[frame_number] = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        process(frame_number)
+        frame_number += 1
+
+    # Recortes próximos ao fim do vídeo (vizinhos posteriores inexistentes)
+    process(float("inf"))
+    capture.release()
+
+    return video_path, results, frame_number, time.perf_counter() - start, None
+
+
+class RoiTracker:
+
+    # Classe responsável por ajustar as coordenadas dos registros de Augmentation ao movimento
+    # do animal. Os registros copiam a caixa do recorte original para os 10 frames vizinhos; o
+    # rastreamento por correspondência de template (OpenCV) encontra a posição da caixa em cada
+    # vizinho, gravada no registro como "coordenadas_rastreadas" (as coordenadas originais são
+    # mantidas). Apenas registros em pixels do vídeo original ("dimensoes") são rastreados
+
+    def __init__(self, video_dir, classes=None, workers=None, radius=10, min_score=0.5, overwrite=False):
+
+        self.video_dir = video_dir
+        self.classes = classes or ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+        self.workers = workers
+        self.radius = radius  # Distância máxima (em frames) entre o vizinho e o frame de origem
+        self.min_score = min_score  # Similaridade mínima para aceitar a nova posição
+        self.overwrite = overwrite  # Rastreia novamente registros já rastreados
+
+    def roi_key(self, register):
+
+        # Chave do recorte de origem de um registro: (origem, x1, x2, y1, y2) ou None
+        origin = origin_frame(register["caminho"])
+        if origin is None or "dimensoes" not in register:
+            return None
+
+        coords = register["coordenadas"]
+        return origin, coords["x1"], coords["x2"], coords["y1"], coords["y2"]
+
+    def run(self):
+
+        # Carrega os registros de todas as classes, agrupa os recortes de origem por vídeo
+        # e distribui os vídeos entre um conjunto de processos
+        stores = {class_name: AugmentationStore(class_name) for class_name in self.classes}
+
+        rois = {}  # {video: set((origem, (x1, x2, y1, y2)))}
+        for store in stores.values():
+            for register in store.iter_records():
+                if "coordenadas_rastreadas" in register and not self.overwrite:
+                    continue
+                key = self.roi_key(register)
+                if key is not None:
+                    rois.setdefault(register["nome do video"], set()).add((key[0], key[1:]))
+
+        videos = AugmentationMaterializer(self.video_dir).find_videos()
+        tracked = {}  # {video: {(origem, x1, x2, y1, y2): {frame: (x1, x2, y1, y2, similaridade)}}}
+        start = time.perf_counter()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+
+            futures = {}
+            for video_name, video_rois in rois.items():
+
+                if video_name not in videos:
+                    print(f"Vídeo '{video_name}' não encontrado em {self.video_dir}")
+                    continue
+
+                future = pool.submit(track_video, videos[video_name], list(video_rois),
+                                     radius=self.radius, min_score=self.min_score)
+                futures[future] = video_name
+
+            for future in as_completed(futures):
+                video_path, results, frames_read, elapsed, error = future.result()
+
+                if error:
+                    print(error)
+                    continue
+
+                tracked[futures[future]] = results
+                fps = frames_read / elapsed if elapsed > 0 else 0
+                print(f"{os.path.basename(video_path)}: {len(results)} recortes rastreados, {fps:.1f} frames/s")
+
+        def apply(dados):
+
+            # Aplica as coordenadas rastreadas aos registros atuais da classe
+            updated = 0
+            for register in dados:
+                key = self.roi_key(register)
+                result = tracked.get(register["nome do video"], {}).get(key, {}).get(register["frame"])
+                if result is None:
+                    continue
+
+                x1, x2, y1, y2, score = result
+                register["coordenadas_rastreadas"] = {"x1": x1, "x2": x2, "y1": y1, "y2": y2}
+                register["similaridade"] = round(score, 3)
+                updated += 1
+
+            return updated
+
+        # Grava as coordenadas rastreadas, reescrevendo apenas as classes alteradas. Os registros são
+        # relidos no momento da gravação (AugmentationStore.update), e não a partir da cópia carregada
+        # antes do rastreamento, para manter as capturas salvas pelo programa durante o processamento
+        total = 0
+        for class_name, store in stores.items():
+            updated = store.update(apply)
+            total += updated
+            print(f"{class_name}: {updated} registros atualizados")
+
+        print(f"Total: {total} registros rastreados em {time.perf_counter() - start:.1f}s")
+
+        return total
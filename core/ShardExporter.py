@@ -0,0 +1,249 @@
+import io
+import os
+import json
+import time
+import tarfile
+
+import cv2
+import numpy as np
+
+from .Catalog import Catalog
+from .AugmentationStore import AugmentationStore
+from .CropExporter import resize_crop
+
+
+class ShardExporter:
+
+    # Classe responsável por empacotar os recortes em arquivos grandes (shards) de tamanho fixo,
+    # evitando que o treinamento abra dezenas de milhares de PNGs pequenos. Dois formatos:
+    #
+    #   - "tar" (compatível com WebDataset): shard-000000.tar com <chave>.png, <chave>.cls (índice
+    #     da classe) e <chave>.json (vídeo, frame, coordenadas e registros de Augmentation), além de
+    #     index.ndjson com a posição (shard, offset, tamanho) de cada imagem para acesso aleatório;
+    #   - "memmap": shard-000000.images.u8 (uint8, N x lado x lado x 3, lido com np.memmap sem cópia),
+    #     shard-000000.labels.npy (índice da classe) e shard-000000.meta.ndjson.
+    #     Recortes ilegíveis são descartados durante a exportação, de forma que as últimas linhas de
+    #     um shard podem ficar vazias: a quantidade válida de cada shard é registrada em dataset.json.
+    #
+    # A exportação é feita em fluxo (um recorte por vez, classe por classe), de forma que o uso de
+    # memória não depende do tamanho da base: os registros de Augmentation são copiados para uma
+    # tabela temporária do SQLite e consultados por recorte. O arquivo dataset.json descreve a exportação
+
+    def __init__(self, output_dir="Shards", pack_format="tar", shard_size=1000, size=None, classes=None):
+
+        self.output_dir = output_dir
+        self.format = pack_format
+        self.shard_size = shard_size  # Quantidade de recortes por shard
+        self.size = size  # Lado dos recortes (obrigatório no formato memmap; None mantém o PNG original)
+        self.classes = classes or ["Indolor", "Pouca dor", "Muita dor", "Incerto"]
+
+        if self.format == "memmap" and not self.size:
+            self.size = 224
+
+    def shard_name(self, number, suffix):
+
+        return os.path.join(self.output_dir, f"shard-{number:06d}{suffix}")
+
+    def load_augmentation(self, catalog, class_name):
+
+        # Copia os registros de Augmentation da classe, em fluxo (iter_records), para uma tabela
+        # temporária do SQLite indexada pelo caminho do recorte. Os registros de cada recorte são
+        # então consultados individualmente, sem manter os registros da classe em memória
+        connection = catalog.connection
+        connection.execute("CREATE TEMP TABLE IF NOT EXISTS augmentation "
+                           "(caminho TEXT, frame INTEGER, coordenadas TEXT)")
+        connection.execute("DROP INDEX IF EXISTS temp.augmentation_caminho")
+        connection.execute("DELETE FROM augmentation")
+
+        def rows():
+            for register in AugmentationStore(class_name).iter_records():
+                coords = register.get("coordenadas_rastreadas", register["coordenadas"])
+                yield (register["caminho"], register["frame"],
+                       json.dumps([coords["x1"], coords["x2"], coords["y1"], coords["y2"]]))
+
+        with connection:
+            connection.executemany("INSERT INTO augmentation VALUES (?, ?, ?)", rows())
+            connection.execute("CREATE INDEX temp.augmentation_caminho ON augmentation (caminho)")
+
+    @staticmethod
+    def augmentation_records(catalog, path):
+
+        # Registros de Augmentation do recorte: [{"frame", "coordenadas"}], em ordem de inserção
+        return [{"frame": frame, "coordenadas": json.loads(coords)} for frame, coords in catalog.connection.execute(
+            "SELECT frame, coordenadas FROM augmentation WHERE caminho = ? ORDER BY rowid", (path,))]
+
+    def items(self, catalog):
+
+        # Percorre os recortes do catálogo, classe por classe, retornando
+        # (chave, índice da classe, imagem, metadados) um de cada vez
+        for label, class_name in enumerate(self.classes):
+
+            self.load_augmentation(catalog, class_name)
+            cursor = catalog.connection.execute(
+                "SELECT caminho, video, frame, indice, x1, x2, y1, y2 FROM recortes "
+                "WHERE classe = ? ORDER BY video, frame, indice", (class_name,))
+
+            for path, video_name, frame, index, x1, x2, y1, y2 in cursor:
+
+                image = cv2.imread(path)
+                if image is None:
+                    print(f"Erro ao carregar {path}")
+                    continue
+
+                if self.size:
+                    image = resize_crop(image, self.size)
+
+                key = os.path.splitext(os.path.basename(path))[0]
+                meta = {"chave": key, "classe": class_name, "rotulo": label, "caminho": path, "video": video_name,
+                        "frame": frame, "indice": index,
+                        "coordenadas": None if x1 is None else [x1, x2, y1, y2],
+                        "augmentation": self.augmentation_records(catalog, path)}
+
+                yield key, label, image, meta
+
+    def run(self):
+
+        start = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        # Remove os shards de uma exportação anterior, que poderia ter mais shards que a atual
+        for file_name in os.listdir(self.output_dir):
+            if file_name.startswith("shard-"):
+                os.remove(os.path.join(self.output_dir, file_name))
+
+        catalog = Catalog()
+        placeholders = ", ".join("?" for _ in self.classes)
+        total = catalog.connection.execute(
+            f"SELECT COUNT(*) FROM recortes WHERE classe IN ({placeholders})", self.classes).fetchone()[0]
+
+        if self.format == "tar":
+            count, shards = self.write_tar(self.items(catalog))
+        else:
+            count, shards = self.write_memmap(self.items(catalog), total)
+
+        catalog.close()
+
+        with open(os.path.join(self.output_dir, "dataset.json"), "w", encoding="utf-8") as file:
+            json.dump({"formato": self.format, "classes": self.classes, "lado": self.size,
+                       "recortes": count, "shards": shards, "recortes_por_shard": self.shard_size,
+                       "criado_em": time.strftime("%Y-%m-%d %H:%M:%S")}, file, ensure_ascii=False, indent=1)
+
+        print(f"{count} recortes em {len(shards)} shards ({self.format}) em {self.output_dir}, "
+              f"{time.perf_counter() - start:.1f}s")
+
+        return count
+
+    def write_tar(self, items):
+
+        # Grava os shards .tar e o índice (index.ndjson) com a posição de cada imagem
+        shards = []
+        tar = None
+        count = 0
+
+        with open(os.path.join(self.output_dir, "index.ndjson"), "w", encoding="utf-8") as index:
+
+            for key, label, image, meta in items:
+
+                if tar is None or shards[-1]["recortes"] == self.shard_size:
+                    if tar is not None:
+                        tar.close()
+                        self.verify_tar(first)
+                    shards.append({"arquivo": os.path.basename(self.shard_name(len(shards), ".tar")), "recortes": 0})
+                    tar = tarfile.open(self.shard_name(len(shards) - 1, ".tar"), "w")
+
+                ok, buffer = cv2.imencode(".png", image)
+                if not ok:
+                    continue
+
+                png = buffer.tobytes()
+                offset = self.add_member(tar, f"{key}.png", png)
+                if shards[-1]["recortes"] == 0:
+                    first = (self.shard_name(len(shards) - 1, ".tar"), offset, len(png))
+                self.add_member(tar, f"{key}.cls", str(label).encode("utf-8"))
+                self.add_member(tar, f"{key}.json", json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+                index.write(json.dumps({"chave": key, "rotulo": label, "shard": shards[-1]["arquivo"],
+                                        "offset": offset, "tamanho": len(png)}) + "\n")
+                shards[-1]["recortes"] += 1
+                count += 1
+
+        if tar is not None:
+            tar.close()
+            if shards[-1]["recortes"]:
+                self.verify_tar(first)
+
+        return count, shards
+
+    @staticmethod
+    def add_member(tar, name, data):
+
+        # Acrescenta o membro ao tar e retorna a posição dos seus dados no arquivo. O addfile não
+        # preenche TarInfo.offset_data na escrita; após a gravação, tar.offset aponta para o fim dos
+        # dados, completados até um múltiplo de 512 bytes (o cabeçalho pode ocupar mais de um bloco)
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+
+        blocks = -(-len(data) // tarfile.BLOCKSIZE)
+        return tar.offset - blocks * tarfile.BLOCKSIZE
+
+    @staticmethod
+    def read_image(shard_path, offset, size):
+
+        # Lê uma imagem diretamente do shard, a partir da posição registrada em index.ndjson
+        with open(shard_path, "rb") as file:
+            file.seek(offset)
+            data = file.read(size)
+
+        return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def verify_tar(self, first):
+
+        # Confere o índice de cada shard: a primeira imagem é lida pela posição registrada e decodificada
+        shard_path, offset, size = first
+        if self.read_image(shard_path, offset, size) is None:
+            raise RuntimeError(f"Índice inválido em {shard_path}: nenhuma imagem na posição {offset}")
+
+    def write_memmap(self, items, total):
+
+        # Grava os shards como arrays uint8 mapeados em disco, com os rótulos em .npy.
+        # O total de recortes é conhecido (catálogo), então cada shard é criado com o tamanho exato
+        shards = []
+        images = labels = meta_file = None
+        position = 0
+        count = 0
+
+        def close_shard():
+
+            if images is None:
+                return
+            images.flush()
+            np.save(self.shard_name(len(shards) - 1, ".labels.npy"), labels[:position])
+            meta_file.close()
+            shards[-1]["recortes"] = position
+
+        for key, label, image, meta in items:
+
+            if images is None or position == len(images):
+                close_shard()
+
+                # O total é estimado pelo catálogo; recortes ilegíveis deixam linhas vazias no final do shard
+                length = max(1, min(self.shard_size, total - count))
+                shards.append({"arquivo": os.path.basename(self.shard_name(len(shards), ".images.u8")),
+                               "recortes": 0, "formato": [length, self.size, self.size, 3]})
+                images = np.memmap(self.shard_name(len(shards) - 1, ".images.u8"), dtype=np.uint8, mode="w+",
+                                   shape=(length, self.size, self.size, 3))
+                labels = np.zeros(length, dtype=np.int16)
+                meta_file = open(self.shard_name(len(shards) - 1, ".meta.ndjson"), "w", encoding="utf-8")
+                position = 0
+
+            images[position] = image
+            labels[position] = label
+            meta_file.write(json.dumps(meta, ensure_ascii=False) + "\n")
+            position += 1
+            count += 1
+
+        close_shard()
+
+        return count, shards
@@ -0,0 +1,129 @@
+import os
+import json
+import bisect
+
+import cv2
+import numpy as np
+
+from .FrameIndex import FrameIndex
+
+
+class SpriteSheet:
+
+    # Classe responsável por gerar uma única imagem (sprite) com miniaturas igualmente espaçadas
+    # ao longo do vídeo, utilizada nas pré-visualizações da barra de rolagem. A imagem é gerada
+    # uma única vez por vídeo e salva em SpriteSheet/<hash do arquivo>.jpg, junto com um JSON
+    # com o tempo (ms) de cada miniatura. Ao passar o mouse sobre a barra, a miniatura é apenas
+    # recortada do sprite, sem nenhuma decodificação do vídeo
+
+    def __init__(self, video_path, cache_dir="SpriteSheet", count=100, tile_width=160, columns=10):
+
+        self.video_path = video_path
+        self.cache_dir = cache_dir
+        self.count = count  # Quantidade de miniaturas
+        self.tile_width = tile_width
+        self.columns = columns
+
+        self.tile_height = 0
+        self.times = []  # Tempo (ms) de cada miniatura, em ordem crescente
+        self.duration = 0  # Duração do vídeo (ms)
+        self.image_path = None
+
+    def load_or_build(self):
+
+        # Carrega o sprite salvo em disco ou, caso não exista, o gera a partir do vídeo
+        key = FrameIndex.file_key(self.video_path)
+        self.image_path = os.path.join(self.cache_dir, f"{key}.jpg")
+        meta_path = os.path.join(self.cache_dir, f"{key}.json")
+
+        if os.path.exists(self.image_path) and os.path.exists(meta_path):
+            try:
+                with open(meta_path, "r", encoding="utf-8") as file:
+                    meta = json.load(file)
+                self.times = meta["tempos"]
+                self.duration = meta["duracao"]
+                self.tile_width, self.tile_height = meta["miniatura"]
+                self.columns = meta["colunas"]
+                return self
+            except (ValueError, KeyError, OSError) as e:
+                print(f"Sprite inválido, será gerado novamente: {e}")
+
+        sprite = self.build()
+        if sprite is None:
+            return self
+
+        # O sprite e seus dados são salvos de forma atômica (arquivo temporário + renomeação)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        ok, buffer = cv2.imencode(".jpg", sprite, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        if ok:
+            with open(self.image_path + ".tmp", "wb") as file:
+                file.write(buffer.tobytes())
+            os.replace(self.image_path + ".tmp", self.image_path)
+
+            with open(meta_path + ".tmp", "w", encoding="utf-8") as file:
+                json.dump({"video": os.path.basename(self.video_path), "tempos": self.times,
+                           "duracao": self.duration, "miniatura": [self.tile_width, self.tile_height],
+                           "colunas": self.columns}, file)
+            os.replace(meta_path + ".tmp", meta_path)
+
+        return self
+
+    def build(self):
+
+        # Extrai as miniaturas posicionando o decodificador em cada tempo (apenas 'count'
+        # reposicionamentos, em vez de decodificar todos os frames de vídeos longos em 4K)
+        capture = cv2.VideoCapture(self.video_path)
+        if not capture.isOpened():
+            print(f"Erro ao abrir {self.video_path}")
+            return None
+
+        fps = capture.get(cv2.CAP_PROP_FPS)
+        frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+        self.duration = frame_count / fps * 1000 if fps > 0 else 0
+
+        tiles = []
+        self.times = []
+
+        for i in range(self.count):
+            time = (i + 0.5) * self.duration / self.count
+            capture.set(cv2.CAP_PROP_POS_MSEC, time)
+            ok, frame = capture.read()
+            if not ok:
+                break
+
+            if not self.tile_height:
+                height, width = frame.shape[:2]
+                self.tile_height = max(1, int(height * self.tile_width / width))
+
+            tiles.append(cv2.resize(frame, (self.tile_width, self.tile_height), interpolation=cv2.INTER_AREA))
+            self.times.append(time)
+
+        capture.release()
+
+        if not tiles:
+            return None
+
+        # Organiza as miniaturas em uma grade de 'columns' colunas
+        rows = (len(tiles) + self.columns - 1) // self.columns
+        sprite = np.zeros((rows * self.tile_height, self.columns * self.tile_width, 3), dtype=np.uint8)
+
+        for i, tile in enumerate(tiles):
+            row, column = divmod(i, self.columns)
+            sprite[row * self.tile_height:(row + 1) * self.tile_height,
+                   column * self.tile_width:(column + 1) * self.tile_width] = tile
+
+        return sprite
+
+    def tile_rect(self, time):
+
+        # Retorna (x, y, largura, altura) da miniatura mais próxima do tempo (ms) informado
+        if not self.times:
+            return None
+
+        position = bisect.bisect_left(self.times, time)
+        if position == len(self.times) or \
+                (position > 0 and time - self.times[position - 1] < self.times[position] - time):
+            position -= 1
+
+        row, column = divmod(position, self.columns)
+        return column * self.tile_width, row * self.tile_height, self.tile_width, self.tile_height
@@ -0,0 +1,40 @@
+# Pacote com a lógica da base de dados de recortes, independente do PyQt5.
+# Pode ser utilizado em scripts, notebooks e servidores sem interface gráfica:
+#
+#   from core import Dataset, AugmentationStore
+#   registros = AugmentationStore("Muita dor").load()
+#
+# ou pela linha de comando: python -m core --help
+#
+# Os módulos são importados apenas no primeiro acesso a cada classe, de forma que
+# comandos que não utilizam o OpenCV (por exemplo, a compactação) iniciam rapidamente
+
+import importlib
+
+# Nomes exportados pelo pacote: {classe: módulo}
+_exports = {
+    "Dataset": "Dataset",
+    "AugmentationStore": "AugmentationStore",
+    "AugmentationMaterializer": "AugmentationMaterializer",
+    "AugmentationConverter": "AugmentationConverter",
+    "RoiTracker": "RoiTracker",
+    "Catalog": "Catalog",
+    "CropExporter": "CropExporter",
+    "ShardExporter": "ShardExporter",
+    "AnnotationExporter": "AnnotationExporter",
+    "FrameIndex": "FrameIndex",
+    "MotionAnalysis": "MotionAnalysis",
+    "SpriteSheet": "SpriteSheet",
+    "ProxyGenerator": "ProxyGenerator",
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+
+    if name in _exports:
+        module = importlib.import_module(f".{_exports[name]}", __name__)
+        return getattr(module, name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,268 @@
+# Comandos de linha de comando do pacote core (sem interface gráfica).
+# Uso: python -m core [--raiz PASTA] <comando> [opções]
+# A pasta raiz é a pasta que contém as pastas de classificação e a pasta Augmentation
+
+import os
+import sys
+import argparse
+
+
+def compact(args):
+
+    # Incorpora os diários (NDJSON) de Augmentation aos arquivos JSON
+    from .AugmentationStore import AugmentationStore
+
+    for name in args.classes or ["Indolor", "Pouca dor", "Muita dor", "Incerto"]:
+        if AugmentationStore(name).compact():
+            print(f"Augmentation_{name}.json compactado")
+
+
+def materialize(args):
+
+    # Gera as imagens dos frames vizinhos a partir dos registros de Augmentation
+    from .AugmentationMaterializer import AugmentationMaterializer
+
+    AugmentationMaterializer(args.videos, args.saida, args.classes, args.processos, args.sobrescrever).run()
+
+
+def convert(args):
+
+    # Converte registros antigos (pixels da pré-visualização) para pixels do vídeo original
+    from .AugmentationConverter import AugmentationConverter
+
+    AugmentationConverter(args.videos, args.classes).run()
+
+
+def track(args):
+
+    # Ajusta as coordenadas dos frames vizinhos ao movimento do animal (rastreamento)
+    from .RoiTracker import RoiTracker
+
+    RoiTracker(args.videos, args.classes, args.processos, args.raio, args.similaridade, args.sobrescrever).run()
+
+
+def export(args):
+
+    # Exporta os recortes em tamanhos fixos para treinamento (incremental)
+    from .CropExporter import CropExporter
+
+    for size in args.tamanho:
+        name = args.nome if len(args.tamanho) == 1 else None
+        CropExporter(size, name, video_dir=args.videos, classes=args.classes, workers=args.processos).run()
+
+
+def pack(args):
+
+    # Empacota os recortes, rótulos e registros de Augmentation em shards (tar ou memmap)
+    from .ShardExporter import ShardExporter
+
+    ShardExporter(args.saida, args.formato, args.recortes, args.tamanho, args.classes).run()
+
+
+def annotate(args):
+
+    # Converte os registros de Augmentation em anotações COCO e YOLO, extraindo os frames dos vídeos
+    from .AnnotationExporter import AnnotationExporter
+
+    AnnotationExporter(args.videos, args.saida, args.classes, args.processos, args.extensao,
+                       args.sobrescrever).run()
+
+
+def frame_index(args):
+
+    # Constrói previamente a tabela de timestamps dos vídeos informados
+    from .FrameIndex import FrameIndex
+
+    for path in args.arquivos:
+        index = FrameIndex(path).load_or_build()
+        print(f"{os.path.basename(path)}: {len(index)} frames")
+
+
+def motion(args):
+
+    # Calcula previamente as medidas de movimento (frames sugeridos) dos vídeos informados
+    from .MotionAnalysis import MotionAnalysis
+
+    for path in args.arquivos:
+        candidates = MotionAnalysis(path).load_or_build().candidates()
+        times = ", ".join(f"{int(t // 60000):02}:{int(t // 1000) % 60:02}" for t in candidates)
+        print(f"{os.path.basename(path)}: {len(candidates)} frames sugeridos ({times})")
+
+
+def proxy(args):
+
+    # Gera previamente as cópias leves (proxy) dos vídeos informados
+    from .ProxyGenerator import ProxyGenerator
+
+    for path in args.arquivos:
+        proxy_path = ProxyGenerator(path, height=args.altura).build()
+        print(f"{os.path.basename(path)}: {proxy_path or 'erro ao gerar o proxy'}")
+
+
+def reconcile(args):
+
+    # Sincroniza o catálogo de recortes com os arquivos presentes nas pastas de classificação
+    from .Catalog import Catalog
+
+    catalog = Catalog(reconcile=False)
+    if args.forcar:
+        # Descarta o catálogo atual, recalculando os hashes de todos os recortes
+        with catalog.connection:
+            catalog.connection.execute("DELETE FROM recortes")
+
+    added, updated, removed = catalog.reconcile()
+    print(f"Catálogo: {added} recortes incluídos, {updated} atualizados, {removed} removidos")
+
+    for class_name, total in sorted(catalog.count().items()):
+        print(f"  {class_name}: {total} recortes")
+    catalog.close()
+
+
+def near_duplicates(args):
+
+    # Relatório das quase-duplicatas (hash perceptual) entre todas as pastas de classificação
+    import csv
+    from .Catalog import Catalog
+
+    pairs = Catalog().near_duplicates(args.distancia)
+    conflicts = 0
+
+    for distance, path_a, path_b in pairs:
+        # Recortes parecidos em classes diferentes indicam uma possível divergência de rótulo
+        conflict = os.path.dirname(path_a) != os.path.dirname(path_b)
+        conflicts += conflict
+        print(f"{distance:2d}  {path_a}  {path_b}" + ("  (classes diferentes)" if conflict else ""))
+
+    if args.saida:
+        with open(args.saida, "w", newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(["distancia", "recorte_a", "recorte_b", "classes_diferentes"])
+            for distance, path_a, path_b in pairs:
+                writer.writerow([distance, path_a, path_b, os.path.dirname(path_a) != os.path.dirname(path_b)])
+
+    print(f"{len(pairs)} pares de quase-duplicatas ({conflicts} entre classes diferentes)")
+
+
+def check_duplicate(args):
+
+    # Informa se uma imagem já está salva na base (sem remover nenhum arquivo)
+    import cv2
+    from .Catalog import Catalog
+
+    image = cv2.imread(args.imagem)
+    if image is None:
+        print(f"Erro ao carregar {args.imagem}")
+        return 1
+
+    catalog = Catalog()
+    path = catalog.find_by_hash(catalog.frame_hash(image), args.video)
+    print(f"Duplicata: {path}" if path else "Nenhuma duplicata encontrada")
+    return 0
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(prog="python -m core",
+                                     description="Ferramentas da base de recortes (sem interface gráfica)")
+    parser.add_argument("--raiz", default=".", help="Pasta raiz da base de dados (padrão: pasta atual)")
+    commands = parser.add_subparsers(dest="comando", required=True)
+
+    cmd = commands.add_parser("compactar", help="Incorpora os diários de Augmentation aos arquivos JSON")
+    cmd.add_argument("--classes", nargs="+", default=None, help="Classes a serem compactadas")
+    cmd.set_defaults(func=compact)
+
+    cmd = commands.add_parser("materializar", help="Gera as imagens dos frames vizinhos (Augmentation)")
+    cmd.add_argument("videos", help="Pasta contendo os vídeos originais (.mp4/.mov)")
+    cmd.add_argument("--saida", default="Augmentation_frames", help="Pasta de destino dos recortes")
+    cmd.add_argument("--processos", type=int, default=None, help="Número de processos")
+    cmd.add_argument("--classes", nargs="+", default=None, help="Classes a serem processadas")
+    cmd.add_argument("--sobrescrever", action="store_true", help="Regrava recortes já existentes")
+    cmd.set_defaults(func=materialize)
+
+    cmd = commands.add_parser("converter", help="Converte coordenadas antigas para pixels do vídeo original")
+    cmd.add_argument("videos", help="Pasta contendo os vídeos originais (.mp4/.mov)")
+    cmd.add_argument("--classes", nargs="+", default=None, help="Classes a serem convertidas")
+    cmd.set_defaults(func=convert)
+
+    cmd = commands.add_parser("rastrear", help="Ajusta as coordenadas dos frames vizinhos ao movimento do animal")
+    cmd.add_argument("videos", help="Pasta contendo os vídeos originais (.mp4/.mov)")
+    cmd.add_argument("--raio", type=int, default=10, help="Quantidade de frames vizinhos rastreados (padrão: 10)")
+    cmd.add_argument("--similaridade", type=float, default=0.5,
+                     help="Similaridade mínima para aceitar a nova posição (padrão: 0.5)")
+    cmd.add_argument("--processos", type=int, default=None, help="Número de processos")
+    cmd.add_argument("--classes", nargs="+", default=None, help="Classes a serem processadas")
+    cmd.add_argument("--sobrescrever", action="store_true", help="Rastreia novamente registros já rastreados")
+    cmd.set_defaults(func=track)
+
+    cmd = commands.add_parser("exportar", help="Exporta os recortes em tamanho fixo para treinamento")
+    cmd.add_argument("--tamanho", type=int, nargs="+", default=[224], help="Lado dos recortes (padrão: 224)")
+    cmd.add_argument("--nome", default=None, help="Nome da exportação em Exportacao/ (padrão: <tamanho>x<tamanho>)")
+    cmd.add_argument("--videos", default=None,
+                     help="Pasta dos vídeos originais: refaz os recortes a partir dos vídeos")
+    cmd.add_argument("--processos", type=int, default=None, help="Número de processos")
+    cmd.add_argument("--classes", nargs="+", default=None, help="Classes a serem exportadas")
+    cmd.set_defaults(func=export)
+
+    cmd = commands.add_parser("empacotar", help="Empacota os recortes em shards para treinamento (tar ou memmap)")
+    cmd.add_argument("--formato", choices=["tar", "memmap"], default="tar", help="Formato dos shards (padrão: tar)")
+    cmd.add_argument("--saida", default="Shards", help="Pasta de destino dos shards")
+    cmd.add_argument("--recortes", type=int, default=1000, help="Recortes por shard (padrão: 1000)")
+    cmd.add_argument("--tamanho", type=int, default=None,
+                     help="Lado dos recortes (padrão: original no tar, 224 no memmap)")
+    cmd.add_argument("--classes", nargs="+", default=None, help="Classes a serem empacotadas")
+    cmd.set_defaults(func=pack)
+
+    cmd = commands.add_parser("anotar", help="Exporta os registros de Augmentation como anotações COCO e YOLO")
+    cmd.add_argument("videos", help="Pasta contendo os vídeos originais (.mp4/.mov)")
+    cmd.add_argument("--saida", default="Anotacoes", help="Pasta de destino das imagens e anotações")
+    cmd.add_argument("--extensao", choices=["jpg", "png"], default="jpg", help="Formato das imagens (padrão: jpg)")
+    cmd.add_argument("--processos", type=int, default=None, help="Número de processos")
+    cmd.add_argument("--classes", nargs="+", default=None, help="Classes a serem exportadas")
+    cmd.add_argument("--sobrescrever", action="store_true", help="Extrai novamente imagens já existentes")
+    cmd.set_defaults(func=annotate)
+
+    cmd = commands.add_parser("indexar-frames", help="Constrói a tabela de timestamps dos vídeos")
+    cmd.add_argument("arquivos", nargs="+", help="Arquivos de vídeo")
+    cmd.set_defaults(func=frame_index)
+
+    cmd = commands.add_parser("analisar", help="Calcula os frames sugeridos (movimento e mudança de cena)")
+    cmd.add_argument("arquivos", nargs="+", help="Arquivos de vídeo")
+    cmd.set_defaults(func=motion)
+
+    cmd = commands.add_parser("proxy", help="Gera as cópias leves dos vídeos, utilizadas na reprodução")
+    cmd.add_argument("arquivos", nargs="+", help="Arquivos de vídeo")
+    cmd.add_argument("--altura", type=int, default=540, help="Altura do proxy em pixels (padrão: 540)")
+    cmd.set_defaults(func=proxy)
+
+    cmd = commands.add_parser("reconciliar", help="Sincroniza o catálogo de recortes com as pastas")
+    cmd.add_argument("--forcar", action="store_true", help="Recalcula os hashes de todos os recortes")
+    cmd.set_defaults(func=reconcile)
+
+    cmd = commands.add_parser("quase-duplicatas", help="Relatório de recortes quase idênticos (hash perceptual)")
+    cmd.add_argument("--distancia", type=int, default=6,
+                     help="Distância de Hamming máxima entre os hashes de 64 bits (padrão: 6)")
+    cmd.add_argument("--saida", default=None, help="Arquivo CSV para o relatório")
+    cmd.set_defaults(func=near_duplicates)
+
+    cmd = commands.add_parser("verificar", help="Verifica se uma imagem já foi salva para um vídeo")
+    cmd.add_argument("imagem", help="Caminho da imagem a ser verificada")
+    cmd.add_argument("video", help="Nome do vídeo (sem extensão)")
+    cmd.set_defaults(func=check_duplicate)
+
+    args = parser.parse_args(argv)
+
+    # Caminhos de vídeos e imagens são relativos à pasta atual, e não à pasta raiz
+    for name in ("videos", "arquivos", "imagem"):
+        value = getattr(args, name, None)
+        if isinstance(value, list):
+            setattr(args, name, [os.path.abspath(v) for v in value])
+        elif value is not None:
+            setattr(args, name, os.path.abspath(value))
+
+    os.chdir(args.raiz)
+
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())